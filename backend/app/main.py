@@ -1,9 +1,18 @@
 from fastapi import FastAPI
 from app.db import db  # ensures Mongo connection is initialized
-from app.routers import artisans, auth, product_description, event_finding, marketing_poster, assistant, profile
+from app.utils.indexes import ensure_indexes
+from app.utils.codec import DefaultResponse
+from app.services.RAG_chatbot import close_http_client
+from app.utils.ai import close_ai_clients
+from app.services.job_queue import job_queue
+from app.routers import artisans, auth, product_description, event_finding, marketing_poster, assistant, profile, export, metrics, products, jobs
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Hidden Gems of India API", version="1.0.0")
+app = FastAPI(
+    title="Hidden Gems of India API",
+    version="1.0.0",
+    default_response_class=DefaultResponse
+)
 
 
 origins = [
@@ -25,8 +34,16 @@ async def startup_db_client():
     try:
         await db.command("ping")
         print("Database connection established at startup.")
+        await ensure_indexes()
     except Exception as e:
         print(f"Database connection failed at startup: {e}")
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    await job_queue.stop()
+    await close_http_client()
+    await close_ai_clients()
 
    
 @app.api_route("/", methods=["GET", "HEAD"])
@@ -37,8 +54,12 @@ async def root_health():
 api_prefix = "/api/v1"
 app.include_router(auth.router, prefix=api_prefix)
 app.include_router(artisans.router, prefix=api_prefix)
+app.include_router(products.router, prefix=api_prefix)
 app.include_router(product_description.router, prefix=api_prefix)
 app.include_router(event_finding.router, prefix=api_prefix)
 app.include_router(marketing_poster.router, prefix=api_prefix)
 app.include_router(assistant.router, prefix=api_prefix)
-app.include_router(profile.router, prefix=api_prefix)
\ No newline at end of file
+app.include_router(profile.router, prefix=api_prefix)
+app.include_router(export.router, prefix=api_prefix)
+app.include_router(metrics.router, prefix=api_prefix)
+app.include_router(jobs.router, prefix=api_prefix)
\ No newline at end of file
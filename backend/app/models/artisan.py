@@ -56,6 +56,10 @@ class ArtisanProfileUpdate(BaseModel):
         extra="forbid"  # disallow unknown fields
     )
 
+class ArtisanBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, description="Artisan user_ids, in the order results should be returned")
+    fields: Optional[List[str]] = Field(None, description="Fields to return (defaults to a slim card projection)")
+
 # --------------------
 # API Response Schema
 # --------------------
@@ -1,6 +1,7 @@
 from typing import Optional, Dict
 from pydantic import BaseModel, EmailStr, Field
 from ..db import db
+from ..utils.codec import encode_document
 from bson import ObjectId
 
 class PyObjectId(ObjectId):
@@ -26,9 +27,9 @@ class User(BaseModel):
 
 def serialize_user(user_dict: Dict) -> Dict:
     """Convert MongoDB document to serializable dictionary"""
-    if user_dict and "_id" in user_dict:
-        user_dict["_id"] = str(user_dict["_id"])
-    return user_dict
+    if not user_dict:
+        return user_dict
+    return encode_document(user_dict, id_field="_id")
 
 async def get_user_by_email(email: str):
     """
@@ -1,48 +1,124 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any, List, Optional
 from app.models.product import ProductCreate
 from app.services.artisan_service import ArtisanService
 from app.services.marketing_service import MarketingService
-from app.models.artisan import ArtisanProfileUpdate
+from app.services.job_queue import job_queue
+from app.routers.jobs import BACKGROUND_QUERY, accepted_job
+from app.models.artisan import ArtisanProfileUpdate, ArtisanBatchRequest
+from app.utils.bulk_upload import read_product_rows
+from app.utils.codec import DefaultResponse
+from app.utils.conditional import conditional_response, make_validators
+from app.utils.pagination import DEFAULT_LIMIT, MAX_LIMIT, parse_fields
 from fastapi import Query, File, UploadFile
 
 router = APIRouter(prefix="/artisans", tags=["Artisans"])
 
+LIMIT_QUERY = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Page size")
+CURSOR_QUERY = Query(None, description="Opaque next_cursor from the previous page")
+FIELDS_QUERY = Query(None, description="Comma-separated list of fields to return")
+
 @router.get("/")
-async def get_artisans():
-    """Get all artisans"""
+async def get_artisans(
+    request: Request,
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """Get a page of artisans (supports If-None-Match)"""
     try:
-        artisans = await ArtisanService.get_all_artisans()
-        return artisans
+        last_modified, count = await ArtisanService.artisan_list_version()
+        validators = make_validators(request, last_modified, count)
+        return await conditional_response(
+            request, validators,
+            lambda: ArtisanService.get_all_artisans(limit, cursor, parse_fields(fields))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/skill/{skill}")
-async def get_artisans_by_skill(skill: str):
-    """Get artisans by skill"""
+async def get_artisans_by_skill(
+    request: Request,
+    skill: str,
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """Get a page of artisans by skill (supports If-None-Match)"""
     try:
-        artisans = await ArtisanService.get_artisans_by_skill(skill)
-        return artisans
+        last_modified, count = await ArtisanService.artisan_list_version(skill=skill)
+        validators = make_validators(request, last_modified, count)
+        return await conditional_response(
+            request, validators,
+            lambda: ArtisanService.get_artisans_by_skill(skill, limit, cursor, parse_fields(fields))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/location/{location}")
-async def get_artisans_by_location(location: str):
-    """Get artisans by location"""
+async def get_artisans_by_location(
+    request: Request,
+    location: str,
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """Get a page of artisans by location (supports If-None-Match)"""
+    try:
+        last_modified, count = await ArtisanService.artisan_list_version(location=location)
+        validators = make_validators(request, last_modified, count)
+        return await conditional_response(
+            request, validators,
+            lambda: ArtisanService.get_artisans_by_location(location, limit, cursor, parse_fields(fields))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Batch routes are declared before /{user_id} so "batch" is not read as an id
+@router.get("/batch")
+async def get_artisans_batch(
+    ids: List[str] = Query(..., description="Artisan user_ids, comma-separated or repeated"),
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """Get many artisans by user_id in one request, in request order, with missing ids reported"""
     try:
-        artisans = await ArtisanService.get_artisans_by_location(location)
-        return artisans
+        user_ids = [i.strip() for value in ids for i in value.split(",")]
+        result = await ArtisanService.get_artisans_batch(user_ids, parse_fields(fields))
+        return DefaultResponse(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def post_artisans_batch(request: ArtisanBatchRequest):
+    """Get many artisans by user_id; POST form for id lists too long for a query string"""
+    try:
+        result = await ArtisanService.get_artisans_batch(request.ids, request.fields)
+        return DefaultResponse(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{user_id}")
-async def get_artisan(user_id: str):
-    """Get a single artisan by user_id"""
+async def get_artisan(request: Request, user_id: str):
+    """Get a single artisan by user_id (supports If-None-Match / If-Modified-Since)"""
     try:
         artisan = await ArtisanService.get_artisan_by_user_id(user_id)
         if not artisan:
             raise HTTPException(status_code=404, detail="Artisan not found")
-        return artisan
+        updated_at = artisan.get("updated_at")
+        validators = make_validators(request, artisan["id"], updated_at, last_modified=updated_at)
+        return await conditional_response(request, validators, lambda: artisan)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -60,13 +136,17 @@ async def create_artisan_profile(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/by-email/{email}")
-async def get_artisan_by_email(email: str):
-    """Get a single artisan by email"""
+async def get_artisan_by_email(request: Request, email: str):
+    """Get a single artisan by email (supports If-None-Match / If-Modified-Since)"""
     try:
         artisan = await ArtisanService.get_artisan_by_email(email)
         if not artisan:
             raise HTTPException(status_code=404, detail="Artisan not found")
-        return artisan
+        updated_at = artisan.get("updated_at")
+        validators = make_validators(request, artisan["id"], updated_at, last_modified=updated_at)
+        return await conditional_response(request, validators, lambda: artisan)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -96,11 +176,21 @@ async def update_artisan_profile(artisan_id: str, updates: ArtisanProfileUpdate)
 
 # Product management routes
 @router.get("/{artisan_id}/products")
-async def get_artisan_products(artisan_id: str):
-    """Get all products for an artisan"""
+async def get_artisan_products(
+    request: Request,
+    artisan_id: str,
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """Get a page of products for an artisan (supports If-None-Match)"""
     try:
-        products = await ArtisanService.get_artisan_products(artisan_id)
-        return products
+        last_modified, count = await ArtisanService.product_list_version(user_id=artisan_id)
+        validators = make_validators(request, last_modified, count)
+        return await conditional_response(
+            request, validators,
+            lambda: ArtisanService.get_artisan_products(artisan_id, limit, cursor, parse_fields(fields))
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -117,6 +207,18 @@ async def add_artisan_product(artisan_id: str, product: ProductCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{artisan_id}/products/bulk")
+async def add_artisan_products_bulk(artisan_id: str, request: Request):
+    """Add many products for an artisan from a JSON array or a CSV upload (text/csv body or multipart 'file')"""
+    try:
+        async with read_product_rows(request) as rows:
+            result = await ArtisanService.add_artisan_products_bulk(artisan_id, rows)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{artisan_id}/products/{product_id}")
 async def delete_artisan_product(artisan_id: str, product_id: str):
     """Delete a product for an artisan"""
@@ -130,11 +232,21 @@ async def delete_artisan_product(artisan_id: str, product_id: str):
 
 # Email-based product endpoints
 @router.get("/by-email/{email}/products")
-async def get_artisan_products_by_email(email: str):
-    """Get all products for an artisan by email"""
+async def get_artisan_products_by_email(
+    request: Request,
+    email: str,
+    limit: int = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+):
+    """Get a page of products for an artisan by email (supports If-None-Match)"""
     try:
-        products = await ArtisanService.get_artisan_products_by_email(email)
-        return products
+        last_modified, count = await ArtisanService.product_list_version(email=email)
+        validators = make_validators(request, last_modified, count)
+        return await conditional_response(
+            request, validators,
+            lambda: ArtisanService.get_artisan_products_by_email(email, limit, cursor, parse_fields(fields))
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -151,12 +263,30 @@ async def add_artisan_product_by_email(email: str, product: ProductCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/by-email/{email}/products/bulk")
+async def add_artisan_products_bulk_by_email(email: str, request: Request):
+    """Add many products for an artisan by email from a JSON array or a CSV upload"""
+    try:
+        async with read_product_rows(request) as rows:
+            result = await ArtisanService.add_artisan_products_bulk_by_email(email, rows)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Marketing and RAG routes
+async def _marketing_job(payload):
+    return await MarketingService.generate_marketing_content(payload["artisan_id"], payload["prompt"], payload.get("image"))
+
+job_queue.register("marketing", _marketing_job)
+
 @router.post("/{artisan_id}/marketing")
 async def get_marketing_output(
     artisan_id: str,
     prompt: str = Query(None, description="Prompt for marketing content"),
-    image: UploadFile = File(None)
+    image: UploadFile = File(None),
+    background: bool = BACKGROUND_QUERY
 ):
     """Generate marketing content for an artisan, considering image if provided"""
     try:
@@ -164,8 +294,12 @@ async def get_marketing_output(
             raise HTTPException(status_code=400, detail="Prompt is required")
         
         image_bytes = await image.read() if image else None
+        if background:
+            return await accepted_job("marketing", {"artisan_id": artisan_id, "prompt": prompt}, files={"image": image_bytes})
         result = await MarketingService.generate_marketing_content(artisan_id, prompt, image_bytes)
         return result
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 from bson import ObjectId
-from typing import List, Dict, Any
-from app.services.RAG_chatbot import rag_answer
+from typing import List, Dict, Any, Optional
+from app.services.RAG_chatbot import rag_answer, rag_answer_stream
+from app.utils.codec import dumps
 
 router = APIRouter(
     prefix="/assistant",
@@ -12,7 +14,8 @@ router = APIRouter(
 
 class ChatRequest(BaseModel):
     query: str
-    top_k: int = 3  # Optional parameter with default value
+    top_k: int = Field(3, ge=1, le=20)  # Most context chunks to put in the prompt
+    budget: Optional[int] = Field(None, ge=50, le=8000)  # Context token budget; server default if omitted
 
 class RetrievedDocument(BaseModel):
     id: str = Field(alias="_id")
@@ -30,6 +33,9 @@ class ChatResponse(BaseModel):
     query: str
     retrieved: List[RetrievedDocument]
     answer: str
+    cached: bool = False  # served from the semantic answer cache
+    prompt_tokens: int = 0  # estimated prompt size sent to Gemini (0 when cached)
+    context_tokens: int = 0  # estimated share of the prompt taken by retrieved chunks
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_assistant(request: ChatRequest):
@@ -43,10 +49,49 @@ async def chat_with_assistant(request: ChatRequest):
         ChatResponse: Contains the original query, retrieved context chunks, and generated answer
     """
     try:
-        result = rag_answer(query=request.query, top_k=request.top_k)
+        result = await rag_answer(query=request.query, top_k=request.top_k, budget=request.budget)
         return result
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing chat request: {str(e)}"
         )
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+@router.post("/chat/stream")
+async def chat_with_assistant_stream(request: ChatRequest, http_request: Request):
+    """
+    Server-sent-events version of /chat.
+
+    Events, in order:
+        retrieved: list of {_id, score, text} context chunks
+        token:     {"text": ...} answer pieces as Gemini generates them (repeated)
+        done:      {"cached": bool, "prompt_tokens": int, "context_tokens": int}
+        error:     {"detail": ...} instead of the remaining events if anything fails
+
+    When the client goes away the generator is closed, which cancels the upstream Gemini stream.
+    """
+    async def event_stream():
+        events = rag_answer_stream(query=request.query, top_k=request.top_k, budget=request.budget)
+        try:
+            async for event, data in events:
+                if await http_request.is_disconnected():
+                    break
+                if event == "token":
+                    data = {"text": data}
+                elif event == "retrieved":
+                    data = [RetrievedDocument.model_validate(doc).model_dump(by_alias=True) for doc in data]
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": f"Error processing chat request: {str(e)}"})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
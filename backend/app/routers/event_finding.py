@@ -1,28 +1,45 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 from typing import Optional
-from app.services.event_finder import find_events, find_events_by_date_range, get_all_events
+from app.services.event_finder import find_events, find_events_by_date_range, get_all_events, events_version
+from app.utils.conditional import conditional_response, make_validators
+from app.utils.pagination import DEFAULT_LIMIT, MAX_LIMIT
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+async def _events_validators(request: Request):
+    # Every event view only changes when the scraper writes, so one marker covers them all
+    last_modified, count = await events_version()
+    return make_validators(request, last_modified, count)
+
 @router.get("/find")
 async def get_events(
+    request: Request,
     location: Optional[str] = Query(None, description="Location to search for (fuzzy match)"),
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format (optional)")
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format (optional)"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page")
 ):
     """
     Get events by location (fuzzy match) and optionally by date.
     This matches the frontend expectation: GET /events?location=...&date=...
+    Without a location it returns a page of all events (limit / cursor, as on GET /events/).
+    Supports If-None-Match.
     """
-    if not location:
-        # If no location provided, return all events
-        events = await get_all_events()
+    async def build():
+        if not location:
+            # If no location provided, return a page of all events
+            return await get_all_events(limit, cursor)
+        events = await find_events(location=location, date=date)
         return {"results": events, "count": len(events)}
-    
-    events = await find_events(location=location, date=date)
-    return {"results": events, "count": len(events)}
+
+    try:
+        return await conditional_response(request, await _events_validators(request), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/by-date-range")
 async def get_events_by_date_range(
+    request: Request,
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format (optional, defaults to start_date)"),
     location: Optional[str] = Query(None, description="Location to search for (fuzzy match, optional)")
@@ -30,20 +47,33 @@ async def get_events_by_date_range(
     """
     Get events based on start time and end time, with optional location filter.
     Returns events that overlap with the given date range and optionally match location.
+    Supports If-None-Match.
     """
-    try:
+    async def build():
         events = await find_events_by_date_range(start_date=start_date, end_date=end_date, location=location)
         return {"results": events, "count": len(events)}
+
+    try:
+        return await conditional_response(request, await _events_validators(request), build)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/")
-async def get_all_events_endpoint():
+async def get_all_events_endpoint(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page")
+):
     """
-    Get all events from the database.
+    Get a page of events, newest first; follow next_cursor for the rest.
+    Supports If-None-Match.
     """
     try:
-        events = await get_all_events()
-        return {"results": events, "count": len(events)}
+        return await conditional_response(
+            request, await _events_validators(request),
+            lambda: get_all_events(limit, cursor)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
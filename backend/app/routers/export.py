@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.db import db
+from app.services.artisan_service import ARTISAN_PRIVATE_FIELDS, serialize_artisan, serialize_product
+from app.services.event_finder import serialize_event
+from app.utils.export import MEDIA_TYPES, export_stream
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+FORMAT_QUERY = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv")
+
+ARTISAN_COLUMNS = [
+    "id", "user_id", "name", "email", "phone", "location", "bio", "shop_name",
+    "story", "skills", "profile_photo", "user_type", "created_at", "updated_at"
+]
+PRODUCT_COLUMNS = [
+    "id", "artisan_user_id", "artisan_email", "name", "description", "price", "category", "images",
+    "availability", "product_link", "created_at", "updated_at"
+]
+
+
+def _export_response(cursor, serializer, fmt: str, name: str, columns=None) -> StreamingResponse:
+    return StreamingResponse(
+        export_stream(cursor, serializer, fmt, columns),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={name}.{fmt}"}
+    )
+
+
+@router.get("/artisans")
+async def export_artisans(format: str = FORMAT_QUERY):
+    """Stream every artisan profile as NDJSON or CSV."""
+    cursor = db["artisans"].find({}, {field: 0 for field in ARTISAN_PRIVATE_FIELDS})
+    return _export_response(cursor, serialize_artisan, format, "artisans", ARTISAN_COLUMNS)
+
+
+@router.get("/products")
+async def export_products(
+    format: str = FORMAT_QUERY,
+    artisan_user_id: Optional[str] = Query(None, description="Only export this artisan's products")
+):
+    """Stream every product (optionally for one artisan) as NDJSON or CSV."""
+    query = {"artisan_user_id": artisan_user_id} if artisan_user_id else {}
+    cursor = db["products"].find(query)
+    return _export_response(cursor, serialize_product, format, "products", PRODUCT_COLUMNS)
+
+
+@router.get("/events")
+async def export_events(format: str = FORMAT_QUERY):
+    """Stream every scraped event as NDJSON or CSV."""
+    cursor = db["events"].find({})
+    return _export_response(cursor, serialize_event, format, "events")
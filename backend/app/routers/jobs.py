@@ -0,0 +1,83 @@
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.services.job_queue import JOB_RESULT_TTL, TERMINAL_STATUSES, QueueFullError, job_queue, serialize_job
+from app.utils.codec import DefaultResponse, dumps
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Opt-in flag for the slow generation endpoints
+BACKGROUND_QUERY = Query(False, description="Return 202 with a job id instead of waiting; follow it under /jobs")
+
+# How often the events stream re-reads a job that another worker process is running
+EVENTS_POLL_INTERVAL = 1.0
+
+async def accepted_job(
+    kind: str,
+    payload: Dict[str, Any],
+    files: Optional[Dict[str, Optional[bytes]]] = None
+) -> DefaultResponse:
+    """Queue a background job and answer 202 with its id and where to follow it."""
+    try:
+        job = await job_queue.enqueue(kind, payload, files)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return DefaultResponse(job, status_code=202, headers={"Location": job["status_url"]})
+
+async def _get_job(job_id: str) -> Dict[str, Any]:
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found (results are kept for {JOB_RESULT_TTL}s)")
+    return job
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Current status of a background job, with its result once it has succeeded."""
+    return serialize_job(await _get_job(job_id))
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Raw result of a job that produces a file (e.g. a poster image)."""
+    job = await _get_job(job_id)
+    if job["status"] not in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job.get("error_status") or 500, detail=job.get("error"))
+    if not job.get("content_type"):
+        return job.get("result")
+    return Response(content=await job_queue.read_result(job), media_type=job["content_type"])
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-sent events for a job: a `status` event whenever its status changes and a final
+    `done` event with the finished job, after which the stream ends.
+    """
+    job = await _get_job(job_id)
+
+    async def event_stream():
+        current = job
+        last_status = None
+        while True:
+            if current is None:
+                yield _sse("error", {"detail": "Job expired"})
+                return
+            if current["status"] in TERMINAL_STATUSES:
+                yield _sse("done", serialize_job(current))
+                return
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield _sse("status", serialize_job(current))
+            await job_queue.wait(job_id, EVENTS_POLL_INTERVAL)
+            if await request.is_disconnected():
+                return
+            current = await job_queue.get(job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
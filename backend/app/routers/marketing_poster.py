@@ -1,14 +1,21 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import StreamingResponse
 from app.services.marketing_poster_generator import generate_minimal_marketing_poster
-import asyncio
+from app.services.job_queue import job_queue
+from app.routers.jobs import BACKGROUND_QUERY, accepted_job
 
 router = APIRouter(prefix="/poster", tags=["Marketing"])
 
+async def _poster_job(payload):
+    return await generate_minimal_marketing_poster(payload["image"], payload.get("product_name", ""))
+
+job_queue.register("poster", _poster_job, content_type="image/jpeg")
+
 @router.post("/generate")
 async def generate_poster_endpoint(
     image: UploadFile = File(..., description="Product image"),
-    product_name: str = Form("", description="Product name (optional)")
+    product_name: str = Form("", description="Product name (optional)"),
+    background: bool = BACKGROUND_QUERY
 ):
     """
     Generate a minimal, neat marketing poster from an uploaded image.
@@ -17,8 +24,10 @@ async def generate_poster_endpoint(
         raise HTTPException(status_code=400, detail="File must be an image.")
 
     image_bytes = await image.read()
+    if background:
+        return await accepted_job("poster", {"product_name": product_name}, files={"image": image_bytes})
     try:
-        poster_bytes = await asyncio.to_thread(generate_minimal_marketing_poster, image_bytes, product_name)
+        poster_bytes = await generate_minimal_marketing_poster(image_bytes, product_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Poster generation failed: {e}")
 
@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from app.services.artisan_service import artisan_cache
+from app.services.embedding_cache import embedding_cache
+from app.services.answer_cache import answer_cache
+from app.services.generation_cache import generation_cache
+from app.utils import singleflight
+from app.services.product_description_gen import groq_quota
+from app.utils.ai import gateway
+from app.services.job_queue import job_queue
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/cache")
+async def cache_metrics():
+    """Hit/miss counters for the in-process caches of this worker."""
+    return {
+        "artisan": artisan_cache.stats(),
+        "embedding": embedding_cache.stats(),
+        "answer": answer_cache.stats(),
+        "generation": generation_cache.stats(),
+    }
+
+@router.get("/singleflight")
+async def singleflight_metrics():
+    """Calls per coalescing group and how many shared an in-flight upstream call."""
+    return {name: group.stats() for name, group in singleflight.groups.items()}
+
+@router.get("/rate-limits")
+async def rate_limit_metrics():
+    """Token buckets pacing outbound provider calls."""
+    return {"groq": groq_quota.stats()}
+
+@router.get("/providers")
+async def provider_metrics():
+    """Per provider/model: circuit state, attempts, retries, hedges and recent latency percentiles."""
+    return gateway.stats()
+
+@router.get("/jobs")
+async def job_metrics():
+    """Background job workers of this process: queue depth and outcomes."""
+    return job_queue.stats()
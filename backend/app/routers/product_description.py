@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 import logging
-from app.services.product_description_gen import generate_description
+import time
+from app.services.product_description_gen import generate_description, get_description_generator
+from app.utils.codec import dumps
+
+MAX_BULK_DESCRIPTIONS = 1000
 
 router = APIRouter(prefix="/product-description", tags=["Marketing"])
 logger = logging.getLogger(__name__)
@@ -15,6 +20,7 @@ class ProductDescriptionRequest(BaseModel):
     artisan_location: Optional[str] = Field(None, description="Location of the artisan")
     target_length: str = Field("medium", description="Target length: short, medium, or long")
     tone: str = Field("professional", description="Tone: professional, casual, artistic, or traditional")
+    force_refresh: bool = Field(False, description="Ignore a cached description and generate a new one")
 
 class BulkProductRequest(BaseModel):
     products: List[Dict] = Field(..., description="List of product data dictionaries", min_items=1)
@@ -27,6 +33,7 @@ class ProductDescriptionResponse(BaseModel):
     highlights: List[str]
     generated_at: str
     keywords_used: List[str]
+    cached: bool = False  # served from the generation cache; generated_at is the original time
 
 class BulkProductResponse(BaseModel):
     results: List[Dict]
@@ -48,7 +55,8 @@ async def generate_product_description(request: ProductDescriptionRequest):
             craft_type=request.craft_type,
             artisan_location=request.artisan_location,
             target_length=request.target_length,
-            tone=request.tone
+            tone=request.tone,
+            force_refresh=request.force_refresh
         )
         
         return ProductDescriptionResponse(**result)
@@ -58,4 +66,50 @@ async def generate_product_description(request: ProductDescriptionRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating product description: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to generate product description")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to generate product description")
+
+@router.post("/bulk", response_model=BulkProductResponse)
+async def generate_bulk_product_descriptions(
+    request: BulkProductRequest,
+    stream: bool = Query(True, description="Stream NDJSON lines as items finish instead of one JSON body at the end")
+):
+    """
+    Generate descriptions for many products. Each item takes the same fields as /generate.
+
+    Requests are paced by a token bucket sized to the Groq requests/tokens-per-minute quota
+    (GROQ_RPM / GROQ_TPM) with a sliding window of in-flight calls, so throughput follows the
+    provider quota. With stream=true (default) every finished item is sent at once as
+    `{"index", "status": "ok", "result"}` or `{"index", "status": "error", "error"}`, in
+    completion order, followed by `{"done": true, "success_count", "error_count", "elapsed_seconds"}`.
+    """
+    if len(request.products) > MAX_BULK_DESCRIPTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_DESCRIPTIONS} products per request")
+    try:
+        generator = get_description_generator()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not stream:
+        results = await generator.generate_bulk_descriptions(request.products)
+        error_count = sum(1 for result in results if "error" in result)
+        return BulkProductResponse(results=results, success_count=len(results) - error_count, error_count=error_count)
+
+    async def ndjson():
+        started = time.perf_counter()
+        success_count = error_count = 0
+        async for index, result, error in generator.iter_bulk_descriptions(request.products):
+            if error is None:
+                success_count += 1
+                line = {"index": index, "status": "ok", "result": result}
+            else:
+                error_count += 1
+                line = {"index": index, "status": "error", "error": error}
+            yield dumps(line) + b"\n"
+        yield dumps({
+            "done": True,
+            "success_count": success_count,
+            "error_count": error_count,
+            "elapsed_seconds": round(time.perf_counter() - started, 2),
+        }) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
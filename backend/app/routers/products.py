@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.services.product_service import ProductService
+from app.utils.codec import DefaultResponse
+from app.utils.pagination import DEFAULT_LIMIT, MAX_LIMIT
+
+router = APIRouter(prefix="/products", tags=["Products"])
+
+@router.get("/search")
+async def search_products(
+    q: str = Query(..., min_length=1, description="Search text, matched against name, description and category"),
+    category: Optional[str] = Query(None, description="Only products in this category"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page")
+):
+    """Search products across all artisans, ranked by relevance, with category and price facets"""
+    try:
+        page = await ProductService.search_products(q, category, min_price, max_price, limit, cursor)
+        return DefaultResponse(page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
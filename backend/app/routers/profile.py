@@ -1,20 +1,32 @@
 
 from fastapi import APIRouter, HTTPException, Query
 from app.services.marketing_service import generate_story_for_artisan
+from app.services.job_queue import job_queue
+from app.routers.jobs import BACKGROUND_QUERY, accepted_job
 
 router = APIRouter(tags=["Profile"])
 
+async def _story_job(payload):
+    return await generate_story_for_artisan(payload["artisan_id"], payload.get("extra_info", ""))
+
+job_queue.register("story", _story_job)
+
 @router.get("/generate-story")
 async def generate_story_from_bio(
     artisan_id: str = Query(..., description="Artisan ID"),
-    extra_info: str = Query("", description="Additional info from artisan (optional)")
+    extra_info: str = Query("", description="Additional info from artisan (optional)"),
+    background: bool = BACKGROUND_QUERY
 ):
     """Generate a story for an artisan using their ID and extra info (query params)."""
     try:
         if not artisan_id:
             raise HTTPException(status_code=400, detail="artisan_id is required")
+        if background:
+            return await accepted_job("story", {"artisan_id": artisan_id, "extra_info": extra_info})
         result = await generate_story_for_artisan(artisan_id, extra_info)
         return result
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
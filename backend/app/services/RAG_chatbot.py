@@ -1,42 +1,71 @@
 import os
-import requests
-import google.generativeai as genai
-from pymongo import MongoClient
+from typing import Any, AsyncIterator, Optional, Tuple
+import httpx
 from dotenv import load_dotenv
+from app.db import db
+from app.services.embedding_cache import embedding_cache, normalize_query
+from app.services.answer_cache import answer_cache
+from app.services.retrievers import get_retriever
+from app.services.context_builder import CANDIDATES_PER_SLOT, build_context, estimate_tokens
+from app.utils.singleflight import SingleFlight, make_key
+from app.utils.ai import GEMINI_MODEL, Target, gateway, get_gemini_model
 
 load_dotenv()
 
 # === CONFIG ===
 HF_API_KEY = os.getenv("HF_API_KEY")
-MONGO_URI = os.getenv("MONGO_URL")
-DB_NAME = "hidden_gems"
 COLLECTION_NAME = "knowledge_base"
-INDEX_NAME = "chat"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_URL = (
+    "https://router.huggingface.co/hf-inference/models/"
+    f"{EMBEDDING_MODEL}/pipeline/feature-extraction"
+)
+# Seconds before a query embedding is hedged, until the gateway has its own p95 for HF
+EMBEDDING_HEDGE_AFTER = float(os.getenv("EMBEDDING_HEDGE_AFTER", "1.5"))
+
+# Identical questions arriving together share one embedding + retrieval + Gemini call
+rag_flight = SingleFlight("rag_answer")
+
+# Shares the app's motor client instead of opening a second, blocking MongoClient
+collection = db[COLLECTION_NAME]
 
-# Gemini setup
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+# One pooled client per process: keeps TLS sessions to the HF router warm between queries
+_http_client: Optional[httpx.AsyncClient] = None
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {HF_API_KEY}"},
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 # === EMBEDDING FUNCTION ===
-def get_embedding(query: str) -> list:
+class EmbeddingAPIError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"HF API error: {status_code} - {detail}")
+        self.status_code = status_code
+
+
+async def fetch_embedding(query: str) -> list:
     """
     Generate 384-dim embedding using HuggingFace API
     """
-    print("[get_embedding] Generating embedding for query...")
-    API_URL = (
-        "https://router.huggingface.co/hf-inference/models/"
-        "sentence-transformers/all-MiniLM-L6-v2/pipeline/feature-extraction"
-    )
-    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-    response = requests.post(API_URL, headers=headers, json={"inputs": query})
+    response = await get_http_client().post(EMBEDDING_URL, json={"inputs": query})
 
     if response.status_code != 200:
-        raise Exception(f"HF API error: {response.status_code} - {response.text}")
+        raise EmbeddingAPIError(response.status_code, response.text)
 
     embedding = response.json()
     if isinstance(embedding[0], list):  # Flatten if [[...]]
@@ -44,53 +73,48 @@ def get_embedding(query: str) -> list:
     return embedding
 
 
-# === VECTOR SEARCH ===
-def search_similar_documents(query: str, top_k: int = 3):
+async def fetch_embeddings(texts: list) -> list:
     """
-    Search MongoDB Atlas vector index for top_k similar documents
+    Embed several texts in one HF call (list `inputs`); returns one 384-dim vector per text, in order
     """
-    query_embedding = get_embedding(query)
-
-    pipeline = [
-        {
-            "$vectorSearch": {
-                "index": INDEX_NAME,
-                "queryVector": query_embedding,
-                "path": "embedding",
-                "numCandidates": 50,
-                "limit": top_k,
-            }
-        },
-        {"$project": {"_id": 1, "score": {"$meta": "vectorSearchScore"}}},
-    ]
-
-    results = list(collection.aggregate(pipeline))
-
-    enhanced = []
-    for result in results:
-        doc = collection.find_one({"_id": result["_id"]})
-        if doc:
-            enhanced.append(
-                {
-                    "_id": result["_id"],
-                    "score": result["score"],
-                    "text": doc.get("text") or doc.get("chunk") or "",
-                }
-            )
-    return enhanced
+    response = await get_http_client().post(EMBEDDING_URL, json={"inputs": texts})
 
+    if response.status_code != 200:
+        raise EmbeddingAPIError(response.status_code, response.text)
 
-# === GEMINI CALL ===
-def call_gemini_rag(query: str, context_texts: list) -> str:
+    embeddings = response.json()
+    if len(embeddings) != len(texts):
+        raise Exception(f"HF API returned {len(embeddings)} embeddings for {len(texts)} inputs")
+    return embeddings
+
+
+async def get_embedding(query: str) -> list:
     """
-    Use Gemini 2.0 Flash to answer the query using context.
+    Embedding for a query, served from the embedding cache when the same (normalized)
+    query was embedded before
     """
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    return await embedding_cache.get_or_compute(query, EMBEDDING_MODEL, _fetch_embedding_guarded)
+
+
+async def _fetch_embedding_guarded(query: str) -> list:
+    # Embedding a query is idempotent and cheap, so a slow request is hedged with an identical
+    # second one; the hedge leg has its own breaker and latency record
+    call = lambda: fetch_embedding(query)
+    return await gateway.call(
+        [
+            Target(f"hf:{EMBEDDING_MODEL}", call, hedge_after=EMBEDDING_HEDGE_AFTER),
+            Target(f"hf:{EMBEDDING_MODEL}:hedge", call),
+        ],
+        hedge=True,
+    )
+
 
+# === GEMINI CALL ===
+def build_rag_prompt(query: str, context_texts: list) -> str:
     # Combine retrieved docs into a context string
     context = "\n\n".join(context_texts)
 
-    prompt = f"""
+    return f"""
 You are a helpful assistant. Use the provided context to answer the question.
 If the context is not enough, say you don't know.
 
@@ -101,27 +125,106 @@ Question: {query}
 Answer:
 """
 
-    response = model.generate_content(prompt)
+
+async def call_gemini_rag(query: str, context_texts: list) -> str:
+    """
+    Use Gemini 2.0 Flash to answer the query using context.
+    """
+    model = get_gemini_model(GEMINI_MODEL)
+    prompt = build_rag_prompt(query, context_texts)
+    response = await gateway.call(
+        [Target(f"gemini:{GEMINI_MODEL}", lambda: model.generate_content_async(prompt))]
+    )
     return response.text
 
 
+async def stream_gemini_rag(query: str, context_texts: list) -> AsyncIterator[str]:
+    """
+    Same prompt as `call_gemini_rag`, yielding answer text as Gemini produces it. Closing the
+    generator early stops reading and releases the upstream stream.
+    """
+    model = get_gemini_model(GEMINI_MODEL)
+    prompt = build_rag_prompt(query, context_texts)
+    # Only opening the stream goes through the gateway; once tokens flow a retry would repeat them
+    response = await gateway.call(
+        [Target(f"gemini:{GEMINI_MODEL}", lambda: model.generate_content_async(prompt, stream=True))]
+    )
+    async for chunk in response:
+        text = getattr(chunk, "text", "")
+        if text:
+            yield text
+
+
 # === RAG PIPELINE ===
-def rag_answer(query: str, top_k: int = 3):
-    retrieved = search_similar_documents(query, top_k=top_k)
-    context_texts = [r["text"] for r in retrieved]
-    answer = call_gemini_rag(query, context_texts)
-    return {"query": query, "retrieved": retrieved, "answer": answer}
+async def retrieve_context(query: str, query_embedding: list, top_k: int, budget: Optional[int]) -> dict:
+    """
+    Over-fetch candidates, then let the context builder pick a diverse, de-duplicated set of
+    at most top_k chunks that fits the token budget.
+    """
+    candidates = await get_retriever().search(
+        query_embedding, top_k=top_k * CANDIDATES_PER_SLOT, query=query, with_vectors=True
+    )
+    return build_context(query_embedding, candidates, top_k=top_k, budget=budget)
+
+
+async def rag_answer(query: str, top_k: int = 3, budget: Optional[int] = None):
+    key = make_key(normalize_query(query), top_k, budget)
+    result = await rag_flight.do(key, lambda: _rag_answer(query, top_k, budget))
+    return {**result, "query": query}
 
 
-# === USAGE ===
-# if __name__ == "__main__":
-#     user_query = "I want funding for my artisan business"
-#     result = rag_answer(user_query)
+async def _rag_answer(query: str, top_k: int, budget: Optional[int]):
+    # Near-duplicate questions against an unchanged knowledge base reuse the earlier answer
+    query_embedding = await get_embedding(query)
+    cached = await answer_cache.lookup(query_embedding, (top_k, budget))
+    if cached:
+        return {
+            "query": query, "retrieved": cached["retrieved"], "answer": cached["answer"],
+            "cached": True, "prompt_tokens": 0, "context_tokens": 0,
+        }
+
+    context = await retrieve_context(query, query_embedding, top_k, budget)
+    retrieved = context["chunks"]
+    context_texts = [r["text"] for r in retrieved]
+    answer = await call_gemini_rag(query, context_texts)
+    await answer_cache.store(query_embedding, (top_k, budget), answer, retrieved)
+    return {
+        "query": query, "retrieved": retrieved, "answer": answer, "cached": False,
+        "prompt_tokens": estimate_tokens(build_rag_prompt(query, context_texts)),
+        "context_tokens": context["context_tokens"],
+    }
 
-#     print("\n--- Retrieved Context ---")
-#     for i, r in enumerate(result["retrieved"], start=1):
-#         print(f"\nChunk {i} (score {r['score']:.4f}):")
-#         print(r["text"])
 
-#     print("\n--- Gemini Answer ---")
-#     print(result["answer"])
+async def rag_answer_stream(query: str, top_k: int = 3, budget: Optional[int] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming `rag_answer`: yields ("retrieved", chunks) once, then ("token", text) pieces, then
+    ("done", {"cached", "prompt_tokens", "context_tokens"}). Only a fully streamed answer is
+    written to the answer cache.
+    """
+    query_embedding = await get_embedding(query)
+    cached = await answer_cache.lookup(query_embedding, (top_k, budget))
+    if cached:
+        yield "retrieved", cached["retrieved"]
+        yield "token", cached["answer"]
+        yield "done", {"cached": True, "prompt_tokens": 0, "context_tokens": 0}
+        return
+
+    context = await retrieve_context(query, query_embedding, top_k, budget)
+    retrieved = context["chunks"]
+    yield "retrieved", retrieved
+
+    context_texts = [r["text"] for r in retrieved]
+    parts = []
+    tokens = stream_gemini_rag(query, context_texts)
+    try:
+        async for text in tokens:
+            parts.append(text)
+            yield "token", text
+    finally:
+        await tokens.aclose()
+    await answer_cache.store(query_embedding, (top_k, budget), "".join(parts), retrieved)
+    yield "done", {
+        "cached": False,
+        "prompt_tokens": estimate_tokens(build_rag_prompt(query, context_texts)),
+        "context_tokens": context["context_tokens"],
+    }
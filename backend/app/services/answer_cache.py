@@ -0,0 +1,178 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from app.db import db
+from app.utils.conditional import collection_version
+
+logger = logging.getLogger(__name__)
+
+KB_COLLECTION = "knowledge_base"
+KB_META_COLLECTION = "kb_meta"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))  # seconds
+# MiniLM cosine above which two questions are treated as the same question
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+# How long a knowledge-base version read is trusted before asking Mongo again
+KB_VERSION_CHECK_INTERVAL = float(os.getenv("KB_VERSION_CHECK_INTERVAL", "10"))
+
+
+async def kb_version(db_instance=None) -> Tuple[Any, ...]:
+    """
+    Change marker for the knowledge base: the ingestion counter bumped by `bump_kb_version`
+    plus the newest chunk _id and chunk count, so inserts made by older scripts that do not
+    bump the counter are still noticed.
+    """
+    database = db_instance if db_instance is not None else db
+    meta = await database[KB_META_COLLECTION].find_one({"_id": KB_COLLECTION}, {"version": 1})
+    newest, count = await collection_version(database[KB_COLLECTION], {}, time_field="_id")
+    return (meta or {}).get("version", 0), str(newest), count
+
+
+async def bump_kb_version(db_instance=None) -> None:
+    """Record that the knowledge base changed. Ingestion calls this after writing chunks."""
+    database = db_instance if db_instance is not None else db
+    await database[KB_META_COLLECTION].update_one(
+        {"_id": KB_COLLECTION},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    answer_cache.invalidate()
+
+
+class SemanticAnswerCache:
+    """
+    Per-process cache of assistant answers looked up by embedding similarity rather than exact
+    text, so "how do I get funding" and "how can I get funding?" share one Gemini call.
+
+    Entries carry the knowledge-base version they were answered against and are dropped when
+    it moves on. Eviction is LRU with a TTL; lookups are one matrix-vector product over at most
+    `maxsize` unit vectors.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        threshold: float = ANSWER_CACHE_THRESHOLD
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+        self._version: Optional[Tuple[Any, ...]] = None
+        self._version_checked = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def invalidate(self) -> None:
+        """Drop every entry, e.g. after new chunks were ingested in this process."""
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._matrix = None
+        self._version = None
+        self._version_checked = 0.0
+
+    async def _current_version(self) -> Optional[Tuple[Any, ...]]:
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > KB_VERSION_CHECK_INTERVAL:
+            try:
+                version = await kb_version()
+            except Exception as e:
+                logger.warning(f"Knowledge base version check failed: {e}")
+                return None
+            if self._version is not None and version != self._version:
+                self.invalidate()
+            self._version = version
+            self._version_checked = now
+        return self._version
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        stale = [entry_id for entry_id, entry in self._entries.items() if entry["created"] < cutoff]
+        for entry_id in stale:
+            del self._entries[entry_id]
+        if stale:
+            self._matrix = None
+
+    def _similarity_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries)
+            self._matrix = (
+                np.stack([self._entries[i]["vector"] for i in self._matrix_ids])
+                if self._matrix_ids else np.zeros((0, 0), dtype=np.float32)
+            )
+        return self._matrix
+
+    async def lookup(self, vector: List[float], params: Any) -> Optional[Dict[str, Any]]:
+        """
+        The cached `{"answer", "retrieved"}` for a close enough earlier question asked with the
+        same `params` (retrieval settings such as top_k and budget), or None.
+        """
+        version = await self._current_version()
+        self._expire()
+        if version is None or not self._entries:
+            self.misses += 1
+            return None
+
+        scores = self._similarity_matrix() @ self._unit(vector)
+        for row in np.argsort(-scores):
+            if scores[row] < self.threshold:
+                break
+            entry_id = self._matrix_ids[row]
+            entry = self._entries[entry_id]
+            if entry["params"] == params and entry["version"] == version:
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                return {"answer": entry["answer"], "retrieved": entry["retrieved"]}
+        self.misses += 1
+        return None
+
+    async def store(self, vector: List[float], params: Any, answer: str, retrieved: List[Dict[str, Any]]) -> None:
+        version = await self._current_version()
+        if version is None:
+            return  # without a version the entry could never be invalidated safely
+        self._entries[self._next_id] = {
+            "vector": self._unit(vector),
+            "params": params,
+            "answer": answer,
+            "retrieved": retrieved,
+            "version": version,
+            "created": time.monotonic(),
+        }
+        self._next_id += 1
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "threshold": self.threshold,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+answer_cache = SemanticAnswerCache()
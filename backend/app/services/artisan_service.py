@@ -1,67 +1,170 @@
-def serialize_artisan(artisan: dict) -> dict:
-    artisan = dict(artisan)  # copy
-    artisan["id"] = str(artisan["_id"])
-    artisan.pop("_id", None)
-    if "password_hash" in artisan:
-        artisan.pop("password_hash")
-    # Convert dates to ISO format
-    for date_field in ["created_at", "updated_at"]:
-        if date_field in artisan and artisan[date_field]:
-            if hasattr(artisan[date_field], "isoformat"):
-                artisan[date_field] = artisan[date_field].isoformat()
-            elif isinstance(artisan[date_field], dict) and "$date" in artisan[date_field]:
-                from datetime import datetime
-                ts = int(artisan[date_field]["$date"]["$numberLong"]) / 1000
-                artisan[date_field] = datetime.utcfromtimestamp(ts).isoformat()
-    return artisan
-from typing import List, Optional, Dict, Any
+import os
+from typing import Iterable, List, Optional, Dict, Any
 from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 from app.db import db
 from app.models.artisan import ArtisanProfileUpdate
+from app.models.product import ProductCreate
+from app.utils.cache import ReadThroughCache
+from app.utils.codec import encode_document
+from app.utils.conditional import collection_version
+from app.utils.pagination import DEFAULT_LIMIT, paginate, build_projection
+from app.utils.search import artisan_search_fields, prefix_query
 from datetime import datetime
 
+# Credentials and search tokens are never part of the profile sent to clients
+ARTISAN_PRIVATE_FIELDS = frozenset({"password_hash", "skills_norm", "location_norm"})
+
+def serialize_artisan(artisan: dict) -> dict:
+    return encode_document(artisan, drop=ARTISAN_PRIVATE_FIELDS)
+
+def serialize_product(product: dict) -> dict:
+    return encode_document(product)
+
+# Bulk product uploads: rows per insert_many round trip, and rows per request
+BULK_INSERT_CHUNK = 500
+MAX_BULK_PRODUCTS = 10000
+
+# Batch lookups: most ids per request, and the slim card projection used by default
+MAX_BATCH_IDS = 300
+ARTISAN_CARD_FIELDS = ["user_id", "name", "shop_name", "location", "skills", "profile_photo"]
+
+# Hot artisan profiles, reachable by user_id, email or _id
+artisan_cache = ReadThroughCache(
+    "artisan",
+    maxsize=int(os.getenv("ARTISAN_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("ARTISAN_CACHE_TTL", "300"))
+)
+
+def _artisan_cache_keys(artisan: dict) -> List[str]:
+    keys = [f"id:{artisan['id']}"]
+    if artisan.get("user_id"):
+        keys.append(f"user_id:{artisan['user_id']}")
+    if artisan.get("email"):
+        keys.append(f"email:{artisan['email']}")
+    return keys
+
+async def invalidate_artisan(
+    artisan_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    email: Optional[str] = None
+) -> None:
+    """Drop every cached alias of an artisan profile after a write."""
+    await artisan_cache.invalidate(
+        f"id:{artisan_id}" if artisan_id else None,
+        f"user_id:{user_id}" if user_id else None,
+        f"email:{email}" if email else None
+    )
+
 class ArtisanService:
     @staticmethod
-    async def get_all_artisans() -> List[Dict[str, Any]]:
-        artisans = []
-        async for artisan in db["artisans"].find({}):
-            artisans.append(serialize_artisan(artisan))
-        return artisans
+    async def _list_artisans(
+        query: Dict[str, Any],
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        return await paginate(
+            db["artisans"],
+            query,
+            limit=limit,
+            cursor=cursor,
+            projection=build_projection(fields, exclude=ARTISAN_PRIVATE_FIELDS),
+            serializer=serialize_artisan
+        )
+
+    @staticmethod
+    async def get_all_artisans(
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get a page of artisans"""
+        return await ArtisanService._list_artisans({}, limit, cursor, fields)
     
     @staticmethod
-    async def get_artisans_by_skill(skill: str) -> List[Dict[str, Any]]:
-        """Get artisans filtered by skill"""
-        query = {"skills": {"$regex": skill, "$options": "i"}}  # Case-insensitive regex
-        artisans = []
-        async for artisan in db["artisans"].find(query):
-            artisans.append(serialize_artisan(artisan))
-        return artisans
+    async def get_artisans_by_skill(
+        skill: str,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get a page of artisans whose skills contain words starting with the given term"""
+        query = prefix_query("skills_norm", skill)
+        return await ArtisanService._list_artisans(query, limit, cursor, fields)
     
     @staticmethod
-    async def get_artisans_by_location(location: str) -> List[Dict[str, Any]]:
-        """Get artisans filtered by location"""
-        query = {"location": {"$regex": location, "$options": "i"}}  # Case-insensitive regex
-        artisans = []
-        async for artisan in db["artisans"].find(query):
-            artisans.append(serialize_artisan(artisan))
-        return artisans
+    async def get_artisans_by_location(
+        location: str,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get a page of artisans whose location contains words starting with the given term"""
+        query = prefix_query("location_norm", location)
+        return await ArtisanService._list_artisans(query, limit, cursor, fields)
     
+    @staticmethod
+    async def artisan_list_version(skill: Optional[str] = None, location: Optional[str] = None) -> tuple:
+        """Change marker (newest updated_at, count) for an artisan listing, without fetching it"""
+        if skill:
+            query = prefix_query("skills_norm", skill)
+        elif location:
+            query = prefix_query("location_norm", location)
+        else:
+            query = {}
+        return await collection_version(db["artisans"], query)
+
+    @staticmethod
+    async def _find_artisan(key: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async def load() -> Optional[Dict[str, Any]]:
+            artisan = await db["artisans"].find_one(query)
+            return serialize_artisan(artisan) if artisan else None
+        return await artisan_cache.get_or_load(key, load, _artisan_cache_keys)
+
     @staticmethod
     async def get_artisan_by_user_id(user_id: str) -> Optional[Dict[str, Any]]:
         """Get a single artisan by user_id"""
-        artisan = await db["artisans"].find_one({"user_id": user_id})
-        if not artisan:
-            return None
-        return serialize_artisan(artisan)
+        return await ArtisanService._find_artisan(f"user_id:{user_id}", {"user_id": user_id})
     
     @staticmethod
     async def get_artisan_by_email(email: str) -> Optional[Dict[str, Any]]:
         """Get a single artisan by email"""
-        artisan = await db["artisans"].find_one({"email": email})
-        if not artisan:
+        return await ArtisanService._find_artisan(f"email:{email}", {"email": email})
+
+    @staticmethod
+    async def get_artisan_by_id(artisan_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single artisan by its document _id"""
+        if not ObjectId.is_valid(artisan_id):
             return None
-        return serialize_artisan(artisan)
+        return await ArtisanService._find_artisan(f"id:{artisan_id}", {"_id": ObjectId(artisan_id)})
     
+    @staticmethod
+    async def get_artisans_batch(user_ids: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Resolve many artisans by user_id with one $in query. Results follow the order of
+        `user_ids` (duplicates collapsed) and ids with no artisan are listed under `missing`.
+        """
+        ids = list(dict.fromkeys(i for i in user_ids if i))
+        if not ids:
+            raise ValueError("At least one id is required")
+        if len(ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} ids can be requested at once")
+
+        wanted = fields or ARTISAN_CARD_FIELDS
+        projection = build_projection(list(wanted) + ["user_id"], exclude=ARTISAN_PRIVATE_FIELDS)
+        found = {}
+        async for artisan in db["artisans"].find({"user_id": {"$in": ids}}, projection):
+            found[artisan["user_id"]] = serialize_artisan(artisan)
+
+        return {
+            "results": [found[i] for i in ids if i in found],
+            "missing": [i for i in ids if i not in found],
+            "count": len(found)
+        }
+
     @staticmethod
     async def create_artisan_profile(user_id: str) -> Dict[str, Any]:
         """Create a default artisan profile for a user"""
@@ -87,9 +190,11 @@ class ArtisanService:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
+        artisan_data.update(artisan_search_fields(artisan_data["skills"], artisan_data["location"]))
         
         result = await db["artisans"].insert_one(artisan_data)
         artisan_data["_id"] = result.inserted_id
+        await invalidate_artisan(str(result.inserted_id), artisan_data["user_id"], artisan_data["email"])
         return serialize_artisan(artisan_data)
     
     @staticmethod
@@ -117,9 +222,11 @@ class ArtisanService:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
+        artisan_data.update(artisan_search_fields(artisan_data["skills"], artisan_data["location"]))
         
         result = await db["artisans"].insert_one(artisan_data)
         artisan_data["_id"] = result.inserted_id
+        await invalidate_artisan(str(result.inserted_id), artisan_data["user_id"], artisan_data["email"])
         return serialize_artisan(artisan_data)
     
     @staticmethod
@@ -133,94 +240,100 @@ class ArtisanService:
             raise ValueError("No update fields provided")
         
         update_data["updated_at"] = datetime.utcnow()
+        if "skills" in update_data:
+            update_data["skills_norm"] = artisan_search_fields(update_data["skills"], None)["skills_norm"]
+        if "location" in update_data:
+            update_data["location_norm"] = artisan_search_fields(None, update_data["location"])["location_norm"]
         
-        result = await db["artisans"].update_one(
+        # Returns the keys we need for cache invalidation in the same round trip
+        artisan = await db["artisans"].find_one_and_update(
             {"_id": ObjectId(artisan_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"user_id": 1, "email": 1},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if artisan is None:
             raise ValueError("Artisan not found")
+        await invalidate_artisan(artisan_id, artisan.get("user_id"), artisan.get("email"))
         
         return {"status": "success", "message": "Profile updated successfully"}
     
     @staticmethod
-    async def get_artisan_products(user_id: str) -> List[Dict[str, Any]]:
-        """Get all products for an artisan by user_id"""
-        products = []
-        async for product in db["products"].find({"artisan_user_id": user_id}):
-            product["id"] = str(product["_id"])
-            product.pop("_id", None)
-            product["artisan_user_id"] = str(product["artisan_user_id"])
-            # Convert dates to ISO format
-            for date_field in ["created_at", "updated_at"]:
-                if date_field in product and product[date_field]:
-                    if hasattr(product[date_field], "isoformat"):
-                        product[date_field] = product[date_field].isoformat()
-                    elif isinstance(product[date_field], dict) and "$date" in product[date_field]:
-                        from datetime import datetime
-                        ts = int(product[date_field]["$date"]["$numberLong"]) / 1000
-                        product[date_field] = datetime.utcfromtimestamp(ts).isoformat()
-            products.append(product)
-        return products
-    
+    async def _list_products(
+        query: Dict[str, Any],
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        return await paginate(
+            db["products"],
+            query,
+            limit=limit,
+            cursor=cursor,
+            sort_field="created_at",
+            projection=build_projection(fields + ["artisan_user_id"] if fields else None, sort_field="created_at"),
+            serializer=serialize_product
+        )
+
     @staticmethod
-    async def get_artisan_products_by_email(email: str) -> List[Dict[str, Any]]:
-        """Get all products for an artisan by email"""
-        # First find the artisan by email
-        print(f"[DEBUG] get_artisan_products_by_email: received email={email}")
-        artisan = await db["artisans"].find_one({"email": email})
-        if not artisan:
-            print(f"[DEBUG] No artisan found for email: {email}")
-            raise ValueError("Artisan not found")
+    async def product_list_version(user_id: Optional[str] = None, email: Optional[str] = None) -> tuple:
+        """Change marker (newest updated_at, count) for one artisan's product listing"""
+        query = {"artisan_user_id": user_id} if user_id else {"artisan_email": email}
+        return await collection_version(db["products"], query)
 
-        user_id = artisan.get("user_id")
-        print(f"[DEBUG] Artisan found. email={email}, user_id={user_id}, artisan_id={artisan.get('id')}")
-        products = []
-        cursor = db["products"].find({"artisan_user_id": user_id})
-        found_any = False
-        async for product in cursor:
-            found_any = True
-            print(f"[DEBUG] Found product for user_id={user_id}: {product}")
-            product["id"] = str(product["_id"])
-            product.pop("_id", None)
-            product["artisan_user_id"] = str(product["artisan_user_id"])
-            # Convert dates to ISO format
-            for date_field in ["created_at", "updated_at"]:
-                if date_field in product and product[date_field]:
-                    if hasattr(product[date_field], "isoformat"):
-                        product[date_field] = product[date_field].isoformat()
-                    elif isinstance(product[date_field], dict) and "$date" in product[date_field]:
-                        from datetime import datetime
-                        ts = int(product[date_field]["$date"]["$numberLong"]) / 1000
-                        product[date_field] = datetime.utcfromtimestamp(ts).isoformat()
-            products.append(product)
-        if not found_any:
-            print(f"[DEBUG] No products found for artisan_user_id={user_id}")
-        print(f"[DEBUG] Returning {len(products)} products for artisan_user_id={user_id}")
-        return products
+    @staticmethod
+    async def get_artisan_products(
+        user_id: str,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get a page of products for an artisan by user_id, newest first"""
+        return await ArtisanService._list_products({"artisan_user_id": user_id}, limit, cursor, fields)
     
     @staticmethod
-    async def add_artisan_product_by_email(email: str, product_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Add a new product for an artisan by email"""
-        # Check if artisan exists by email
-        artisan = await db["artisans"].find_one({"email": email})
-        if not artisan:
-            raise ValueError("Artisan not found")
-        
-        user_id = artisan["user_id"]
-        product = {
+    async def get_artisan_products_by_email(
+        email: str,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get a page of products for an artisan by email, newest first"""
+        # Products carry the artisan's email, so this is a single indexed query
+        page = await ArtisanService._list_products({"artisan_email": email}, limit, cursor, fields)
+        if not page["results"] and not cursor:
+            # Only an empty first page needs to tell "no products" apart from "no artisan"
+            if not await ArtisanService.get_artisan_by_email(email):
+                raise ValueError("Artisan not found")
+        return page
+    
+    @staticmethod
+    def _build_product(user_id: str, email: Optional[str], product_data: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
             "artisan_user_id": user_id,
+            "artisan_email": email,
             "name": product_data.get("name"),
             "description": product_data.get("description"),
             "price": product_data.get("price"),
             "category": product_data.get("category"),
-            "images": product_data.get("images", []),
+            "images": product_data.get("images") or [],
             "availability": product_data.get("availability", True),
             "product_link": product_data.get("product_link") or "https://example.com/product/" + user_id,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         }
+
+    @staticmethod
+    async def add_artisan_product_by_email(email: str, product_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a new product for an artisan by email"""
+        # Check if artisan exists by email
+        artisan = await ArtisanService.get_artisan_by_email(email)
+        if not artisan:
+            raise ValueError("Artisan not found")
+        
+        product = ArtisanService._build_product(artisan["user_id"], email, product_data)
         result = await db["products"].insert_one(product)
         return {
             "status": "success", 
@@ -232,27 +345,93 @@ class ArtisanService:
     async def add_artisan_product(user_id: str, product_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new product for an artisan by user_id"""
         # Check if artisan exists
-        artisan = await db["artisans"].find_one({"user_id": user_id})
+        artisan = await ArtisanService.get_artisan_by_user_id(user_id)
         if not artisan:
             raise ValueError("Artisan not found")
-        product = {
-            "artisan_user_id": user_id,
-            "name": product_data.get("name"),
-            "description": product_data.get("description"),
-            "price": product_data.get("price"),
-            "category": product_data.get("category"),
-            "images": product_data.get("images", []),
-            "availability": product_data.get("availability", True),
-            "product_link": product_data.get("product_link") or "https://example.com/product/" + user_id,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        product = ArtisanService._build_product(user_id, artisan.get("email"), product_data)
         result = await db["products"].insert_one(product)
         return {
             "status": "success", 
             "message": "Product added successfully",
             "product_id": str(result.inserted_id)
         }
+
+    @staticmethod
+    async def _insert_products_bulk(
+        user_id: str,
+        email: Optional[str],
+        rows: Iterable[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Validate rows with ProductCreate and insert the valid ones in unordered chunks.
+        _ids are assigned client-side so every row can be reported even when a chunk partially fails.
+
+        The whole upload is read and validated before the first write, so an oversized upload
+        or an undecodable CSV (both ValueError) is rejected with nothing inserted, and a retry
+        cannot duplicate products.
+        """
+        results: List[Dict[str, Any]] = []
+        pending: List[tuple] = []
+
+        for row, raw in enumerate(rows):
+            if row >= MAX_BULK_PRODUCTS:
+                raise ValueError(f"Bulk upload is limited to {MAX_BULK_PRODUCTS} products; nothing was inserted")
+            try:
+                product = ProductCreate.model_validate(raw)
+            except ValidationError as e:
+                errors = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+                results.append({"row": row, "status": "error", "error": errors})
+                continue
+            doc = ArtisanService._build_product(user_id, email, product.model_dump(exclude_unset=True))
+            doc["_id"] = ObjectId()
+            pending.append((row, doc))
+
+        for start in range(0, len(pending), BULK_INSERT_CHUNK):
+            chunk = pending[start:start + BULK_INSERT_CHUNK]
+            failed: Dict[int, str] = {}
+            try:
+                await db["products"].insert_many([doc for _, doc in chunk], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed[error["index"]] = error.get("errmsg", "Write failed")
+            except Exception as e:
+                if start == 0:
+                    raise
+                # Earlier chunks are committed: report them instead of failing the whole request,
+                # so the client retries only the rows marked as errors
+                for row, _ in pending[start:]:
+                    results.append({"row": row, "status": "error", "error": f"Not inserted: {e}"})
+                break
+            for position, (row, doc) in enumerate(chunk):
+                if position in failed:
+                    results.append({"row": row, "status": "error", "error": failed[position]})
+                else:
+                    results.append({"row": row, "status": "created", "product_id": str(doc["_id"])})
+
+        results.sort(key=lambda r: r["row"])
+        created = sum(1 for r in results if r["status"] == "created")
+        return {
+            "status": "success" if created == len(results) else "partial",
+            "inserted_count": created,
+            "error_count": len(results) - created,
+            "results": results
+        }
+
+    @staticmethod
+    async def add_artisan_products_bulk(user_id: str, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add many products for an artisan by user_id"""
+        artisan = await ArtisanService.get_artisan_by_user_id(user_id)
+        if not artisan:
+            raise ValueError("Artisan not found")
+        return await ArtisanService._insert_products_bulk(user_id, artisan.get("email"), rows)
+
+    @staticmethod
+    async def add_artisan_products_bulk_by_email(email: str, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add many products for an artisan by email"""
+        artisan = await ArtisanService.get_artisan_by_email(email)
+        if not artisan:
+            raise ValueError("Artisan not found")
+        return await ArtisanService._insert_products_bulk(artisan["user_id"], email, rows)
     
     @staticmethod
     async def delete_artisan_product(artisan_id: str, product_id: str) -> Dict[str, Any]:
@@ -5,6 +5,9 @@ from jose import JWTError, jwt
 from bson import ObjectId
 from app.db import db
 from app.models.auth import SignupRequest, LoginRequest
+from app.utils.search import artisan_search_fields
+from app.utils.codec import encode_document
+from app.services.artisan_service import ArtisanService, invalidate_artisan
 import os
 from uuid import uuid4
 
@@ -76,7 +79,9 @@ class AuthService:
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
             }
-            await db["artisans"].insert_one(artisan_doc)
+            artisan_doc.update(artisan_search_fields(artisan_doc["skills"], artisan_doc["location"]))
+            result = await db["artisans"].insert_one(artisan_doc)
+            await invalidate_artisan(str(result.inserted_id), artisan_doc["user_id"], artisan_doc["email"])
         
         return {"status": "success", "message": "User created successfully"}
     
@@ -131,25 +136,12 @@ class AuthService:
         
         # Get user from appropriate collection
         if user_type == "artisan":
-            user = await db["artisans"].find_one({"user_id": user_id})
-            if user:
-                # Use serialize_artisan for proper ObjectId handling
-                from app.services.artisan_service import serialize_artisan
-                return serialize_artisan(user)
+            artisan = await ArtisanService.get_artisan_by_user_id(user_id)
+            if artisan:
+                return artisan
         else:
             user = await db["users"].find_one({"_id": ObjectId(user_id)})
             if user:
-                # Serialize user data properly
-                user_data = dict(user)
-                user_data["id"] = str(user_data["_id"])
-                user_data.pop("_id", None)
-                if "password_hash" in user_data:
-                    del user_data["password_hash"]
-                # Convert dates to ISO format
-                for date_field in ["created_at", "updated_at"]:
-                    if date_field in user_data and user_data[date_field]:
-                        if hasattr(user_data[date_field], "isoformat"):
-                            user_data[date_field] = user_data[date_field].isoformat()
-                return user_data
+                return encode_document(user, drop=frozenset({"password_hash"}))
         
         raise ValueError("User not found")
\ No newline at end of file
@@ -0,0 +1,106 @@
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Gemini averages about 4 characters per token on English prose; close enough for budgeting
+CHARS_PER_TOKEN = 4
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# Retrieve this many candidates per context slot so MMR has something to choose from
+CANDIDATES_PER_SLOT = 3
+# 1.0 ranks on relevance alone, 0.0 on novelty alone
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+# Chunks at least this similar to one already chosen are dropped as near-duplicates
+DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.92"))
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit]
+
+
+def _unit_rows(vectors: List[Any]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def build_context(
+    query_vector: List[float],
+    candidates: List[Dict[str, Any]],
+    top_k: int = 3,
+    budget: Optional[int] = None,
+    mmr_lambda: float = MMR_LAMBDA,
+    duplicate_threshold: float = DUPLICATE_THRESHOLD
+) -> Dict[str, Any]:
+    """
+    Choose up to `top_k` of the retrieved `candidates` for the prompt.
+
+    Candidates are picked greedily by maximal marginal relevance: cosine to the query, minus
+    similarity to the chunks already picked. Exact repeats and near-duplicates are dropped,
+    and a chunk is only taken while the running estimate stays within `budget` tokens (if
+    nothing fits, the best chunk is cut down to the budget). Candidates without an
+    `embedding` keep their retrieval order.
+
+    Returns {"chunks", "context_tokens", "dropped_duplicates"}; chunks are
+    {"_id", "score", "text"} with the retrieval score.
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    seen_texts = set()
+    pool = []
+    dropped = 0
+    for candidate in candidates:
+        key = " ".join(candidate["text"].split())
+        if not key or key in seen_texts:
+            dropped += 1 if key else 0
+            continue
+        seen_texts.add(key)
+        pool.append(candidate)
+
+    if pool and all(candidate.get("embedding") is not None for candidate in pool):
+        docs = _unit_rows([candidate["embedding"] for candidate in pool])
+        query = _unit_rows([query_vector])[0]
+        relevance = docs @ query
+        similarity = docs @ docs.T
+    else:
+        relevance = np.linspace(1.0, 0.0, num=len(pool), dtype=np.float32) if pool else np.zeros(0)
+        similarity = None
+
+    chosen: List[int] = []
+    used = 0
+    remaining = list(range(len(pool)))
+    while remaining and len(chosen) < top_k:
+        if similarity is not None and chosen:
+            redundancy = similarity[np.ix_(remaining, chosen)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        scores = mmr_lambda * relevance[remaining] - (1 - mmr_lambda) * redundancy
+        best = int(np.argmax(scores))
+        index = remaining.pop(best)
+
+        if redundancy[best] >= duplicate_threshold:
+            dropped += 1
+            continue
+        tokens = estimate_tokens(pool[index]["text"])
+        if used + tokens > budget:
+            continue  # a shorter candidate further down may still fit
+        chosen.append(index)
+        used += tokens
+
+    chunks = [{key: pool[i][key] for key in ("_id", "score", "text")} for i in chosen]
+    if not chunks and pool:
+        best = pool[int(np.argmax(relevance))]
+        text = _truncate_to_tokens(best["text"], budget)
+        chunks = [{"_id": best["_id"], "score": best["score"], "text": text}]
+        used = estimate_tokens(text)
+
+    return {"chunks": chunks, "context_tokens": used, "dropped_duplicates": dropped}
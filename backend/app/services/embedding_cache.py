@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import os
+from array import array
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Any, List
+
+from bson.binary import Binary
+from cachetools import LRUCache
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "embedding_cache"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))  # seconds
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold and collapse whitespace. MiniLM is uncased, so this does not change the vector."""
+    return " ".join(text.casefold().split())
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    """384 floats -> 1,536 bytes of little-endian float32 (vs ~8 KB as a JSON/BSON double list)."""
+    packed = array("f", vector)
+    if packed.itemsize != 4:
+        raise RuntimeError("float32 array type is not 4 bytes on this platform")
+    return packed.tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    return array("f", data).tolist()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings keyed by (model, normalized text): a per-process LRU
+    in front of a Mongo collection whose TTL index expires old vectors. Cache failures are
+    logged and fall through to the embedding call, never surfaced to the caller.
+    """
+
+    def __init__(self, maxsize: int = EMBEDDING_CACHE_SIZE):
+        self._memory = LRUCache(maxsize=maxsize)
+        self.collection = db[COLLECTION_NAME]
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+    async def get_or_compute(
+        self,
+        query: str,
+        model: str,
+        compute: Callable[[str], Awaitable[List[float]]]
+    ) -> List[float]:
+        text = normalize_query(query)
+        key = self.key(text, model)
+
+        vector = self._memory.get(key)
+        if vector is not None:
+            self.memory_hits += 1
+            return vector
+
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"vector": 1})
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            doc = None
+        if doc:
+            self.store_hits += 1
+            vector = unpack_vector(doc["vector"])
+            self._memory[key] = vector
+            return vector
+
+        self.misses += 1
+        vector = await compute(text)
+        self._memory[key] = vector
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "model": model,
+                    "text": text,
+                    "dim": len(vector),
+                    "vector": Binary(pack_vector(vector)),
+                    "created_at": datetime.utcnow(),
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.store_hits + self.misses
+        hits = self.memory_hits + self.store_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache()
@@ -4,6 +4,9 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from rapidfuzz import fuzz
 from fastapi import HTTPException
 from app.db import db  # adjust import if needed
+from app.utils.codec import encode_document
+from app.utils.conditional import collection_version
+from app.utils.pagination import DEFAULT_LIMIT, paginate
 
 def fuzzy_match(a: str, b: str, threshold: int = 70) -> bool:
     if not a or not b:
@@ -11,10 +14,16 @@ def fuzzy_match(a: str, b: str, threshold: int = 70) -> bool:
     return fuzz.token_set_ratio(a.lower(), b.lower()) >= threshold
 
 def serialize_event(event: dict) -> dict:
-    # Convert ObjectId to string for JSON serialization
-    if "_id" in event:
-        event["_id"] = str(event["_id"])
-    return event
+    # Events keep their "_id" key; the frontend reads it as-is
+    return encode_document(event, id_field="_id")
+
+async def events_version(db_instance: Optional[AsyncIOMotorDatabase] = None) -> tuple:
+    """
+    Change marker for the events collection. Events are only written by the scraper, which
+    inserts fresh documents, so the newest _id plus the count identifies each scrape.
+    """
+    dbi = db_instance or db
+    return await collection_version(dbi["events"], {}, time_field="_id")
 
 async def find_events(
     location: str,
@@ -32,12 +41,9 @@ async def find_events(
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
 
-    # Fetch all events (for fuzzy matching in Python)
-    events_cursor = dbi["events"].find({})
-    events = await events_cursor.to_list(length=1000)
-
+    # Stream every event through the fuzzy matcher in Python; only matches are kept in memory
     matching_events = []
-    for event in events:
+    async for event in dbi["events"].find({}):
         venue = event.get("Venue of Event", "")
         start = event.get("Event Start Date")
         end = event.get("Event End Date")
@@ -75,12 +81,9 @@ async def find_events_by_date_range(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
     
-    # Fetch all events and filter by date overlap
-    events_cursor = dbi["events"].find({})
-    events = await events_cursor.to_list(length=1000)
-    
+    # Stream every event and filter by date overlap
     matching_events = []
-    for event in events:
+    async for event in dbi["events"].find({}):
         start = event.get("Event Start Date")
         end = event.get("Event End Date")
         venue = event.get("Venue of Event", "")
@@ -104,13 +107,14 @@ async def find_events_by_date_range(
     
     return matching_events
 
-async def get_all_events(db_instance: Optional[AsyncIOMotorDatabase] = None) -> List[dict]:
+async def get_all_events(
+    limit: int = DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    db_instance: Optional[AsyncIOMotorDatabase] = None
+) -> dict:
     """
-    Get all events from the database.
+    Get a page of events, newest first.
+    Returns {"results", "count", "next_cursor"}; pass next_cursor back for the next page.
     """
     dbi = db_instance or db
-    
-    events_cursor = dbi["events"].find({})
-    events = await events_cursor.to_list(length=1000)
-    
-    return [serialize_event(event) for event in events]
\ No newline at end of file
+    return await paginate(dbi["events"], {}, limit=limit, cursor=cursor, serializer=serialize_event)
\ No newline at end of file
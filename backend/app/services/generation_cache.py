@@ -0,0 +1,82 @@
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "generation_cache"
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "1024"))
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", str(30 * 24 * 3600)))  # seconds
+
+
+class GenerationCache:
+    """
+    Content-addressed cache for deterministic (temperature 0) generations, keyed by model and
+    the exact prompt. A per-process LRU sits in front of a Mongo collection whose TTL index
+    expires old entries. Like the embedding cache, storage failures are logged and treated as
+    misses, never surfaced to the caller.
+    """
+
+    def __init__(self, maxsize: int = GENERATION_CACHE_SIZE):
+        self._memory = LRUCache(maxsize=maxsize)
+        self.collection = db[COLLECTION_NAME]
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def key(model: str, *prompt_parts: str) -> str:
+        digest = hashlib.sha256(model.encode("utf-8"))
+        for part in prompt_parts:
+            digest.update(b"\x00" + part.encode("utf-8"))
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return dict(value)
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"result": 1})
+        except Exception as e:
+            logger.warning(f"Generation cache read failed: {e}")
+            doc = None
+        if doc:
+            self.store_hits += 1
+            self._memory[key] = doc["result"]
+            return dict(doc["result"])
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, model: str, result: Dict[str, Any], refresh: bool = False) -> None:
+        if refresh:
+            self.refreshes += 1
+        self._memory[key] = result
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {"model": model, "result": result, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Generation cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.store_hits + self.misses
+        hits = self.memory_hits + self.store_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "forced_refreshes": self.refreshes,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+generation_cache = GenerationCache()
@@ -0,0 +1,344 @@
+"""
+Background jobs for slow generation endpoints.
+
+A job is a Mongo document in `jobs` (kind, payload, status, result). Mongo is the queue: each
+process runs a fixed pool of worker tasks that atomically claim the oldest queued job
+(queued -> running), run the handler registered for its kind under JOB_TIMEOUT and store the
+result, which is kept for JOB_RESULT_TTL seconds. Enqueueing wakes a local worker at once;
+idle workers also poll every JOB_POLL_INTERVAL, so jobs queued by other processes (or while
+every worker was busy) are picked up too.
+
+While a job runs its worker refreshes `heartbeat_at`. A reaper in every process re-queues
+running jobs whose heartbeat went stale (the worker was killed by a restart or deploy) and
+purges expired jobs together with their files.
+
+Uploaded inputs and file results (e.g. images) live in GridFS (`job_files`), not in the job
+document, so they are not bound by Mongo's 16 MB document limit.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import ReturnDocument
+
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "jobs"
+FILES_BUCKET = "job_files"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))  # queued jobs across all processes
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "180"))  # seconds per run
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", str(24 * 3600)))  # seconds
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_REAP_INTERVAL = float(os.getenv("JOB_REAP_INTERVAL", "30"))
+# A running job whose heartbeat is older than this lost its worker
+JOB_STALE_AFTER = JOB_HEARTBEAT_INTERVAL * 3
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, maxsize: int = JOB_QUEUE_SIZE):
+        self.collection = db[COLLECTION_NAME]
+        self._files = None
+        self.workers = workers
+        self.maxsize = maxsize
+        self.worker_id = uuid.uuid4().hex  # this process, for the `worker_id` field of claimed jobs
+        self._handlers: Dict[str, Handler] = {}
+        self._content_types: Dict[str, Optional[str]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiters: Dict[str, list] = {}  # job id -> [event, number of waiters]
+        self.succeeded = 0
+        self.failed = 0
+        self.requeued = 0
+
+    @property
+    def files(self) -> AsyncIOMotorGridFSBucket:
+        if self._files is None:
+            self._files = AsyncIOMotorGridFSBucket(db, bucket_name=FILES_BUCKET)
+        return self._files
+
+    def register(self, kind: str, handler: Handler, content_type: Optional[str] = None) -> None:
+        """
+        Run `handler(payload)` for jobs of `kind`. The payload holds the enqueued fields, with
+        files passed to `enqueue` loaded back as bytes. Handlers return a JSON-able result, or
+        raw bytes when `content_type` is given (served as-is from the result endpoint).
+        """
+        self._handlers[kind] = handler
+        self._content_types[kind] = content_type
+
+    # === LIFECYCLE ===
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # === PRODUCER ===
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        files: Optional[Dict[str, Optional[bytes]]] = None
+    ) -> Dict[str, Any]:
+        """Persist a job; `files` (name -> bytes) are stored in GridFS and handed back to the handler."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if not self._tasks:
+            raise QueueFullError("Job workers are not running")
+        if await self.collection.count_documents({"status": "queued"}, limit=self.maxsize) >= self.maxsize:
+            raise QueueFullError("Too many background jobs queued, try again shortly")
+        job_id = uuid.uuid4().hex
+        file_ids = {}
+        for name, data in (files or {}).items():
+            if data is not None:
+                file_ids[name] = await self.files.upload_from_stream(f"{job_id}/{name}", data)
+        now = datetime.utcnow()
+        job = {
+            "_id": job_id,
+            "kind": kind,
+            "payload": payload,
+            "input_files": file_ids,
+            "status": "queued",
+            "attempts": 0,
+            "created_at": now,
+            # Abandoned jobs expire too; finishing moves this to finished_at + JOB_RESULT_TTL
+            "expires_at": now + timedelta(seconds=JOB_TIMEOUT * JOB_MAX_ATTEMPTS + JOB_RESULT_TTL),
+        }
+        await self.collection.insert_one(job)
+        self._wakeup.set()
+        return serialize_job(job)
+
+    # === WORKERS ===
+    @staticmethod
+    def _finish_fields(status: str, **fields: Any) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            "status": status,
+            "finished_at": now,
+            "expires_at": now + timedelta(seconds=JOB_RESULT_TTL),
+            "payload": None,  # inputs are not kept once the job is done
+            **fields,
+        }
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"status": "queued"},
+            {
+                "$set": {"status": "running", "started_at": now, "heartbeat_at": now, "worker_id": self.worker_id},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job['_id']} could not be processed: {e}")
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                await self.collection.update_one(
+                    {"_id": job_id, "status": "running", "worker_id": self.worker_id},
+                    {"$set": {"heartbeat_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id, kind = job["_id"], job["kind"]
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            handler = self._handlers[kind]
+            payload = dict(job["payload"] or {})
+            for name, file_id in (job.get("input_files") or {}).items():
+                payload[name] = await (await self.files.open_download_stream(file_id)).read()
+            result = await asyncio.wait_for(handler(payload), JOB_TIMEOUT)
+        except asyncio.TimeoutError:
+            update = self._finish_fields("failed", error=f"Timed out after {JOB_TIMEOUT:.0f}s", error_status=504)
+        except ValueError as e:
+            update = self._finish_fields("failed", error=str(e), error_status=400)
+        except Exception as e:
+            update = self._finish_fields("failed", error=str(e), error_status=500)
+        else:
+            content_type = self._content_types.get(kind)
+            if content_type:
+                # A failed upload fails the job like a handler error; left running, the reaper
+                # would requeue it and the handler would run again
+                try:
+                    result_file = await self.files.upload_from_stream(f"{job_id}/result", result)
+                except Exception as e:
+                    update = self._finish_fields("failed", error=f"Could not store the result: {e}", error_status=500)
+                else:
+                    update = self._finish_fields("succeeded", result=None, result_file=result_file, content_type=content_type)
+            else:
+                update = self._finish_fields("succeeded", result=result)
+        finally:
+            heartbeat.cancel()
+
+        # Only the worker that still owns the job may finish it; if the reaper handed it to
+        # someone else in the meantime, that run's result wins
+        finished = await self.collection.update_one(
+            {"_id": job_id, "status": "running", "worker_id": self.worker_id},
+            {"$set": update}
+        )
+        if not finished.modified_count:
+            if update.get("result_file") is not None:
+                await self._delete_files([update["result_file"]])
+            return
+        await self._delete_files(list((job.get("input_files") or {}).values()))
+        if update["status"] == "succeeded":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        waiter = self._waiters.pop(job_id, None)
+        if waiter is not None:
+            waiter[0].set()
+
+    # === REAPER ===
+    async def _reaper(self) -> None:
+        while True:
+            try:
+                await self.reap()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job reaper failed: {e}")
+            await asyncio.sleep(JOB_REAP_INTERVAL)
+
+    async def reap(self) -> None:
+        """Re-queue jobs whose worker stopped heartbeating and purge expired jobs and their files."""
+        now = datetime.utcnow()
+        stale = {"status": "running", "heartbeat_at": {"$lt": now - timedelta(seconds=JOB_STALE_AFTER)}}
+        await self.collection.update_many(
+            {**stale, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+            {"$set": self._finish_fields("failed", error="Interrupted too many times", error_status=500)}
+        )
+        requeued = await self.collection.update_many(stale, {"$set": {"status": "queued"}})
+        if requeued.modified_count:
+            self.requeued += requeued.modified_count
+            self._wakeup.set()
+
+        async for job in self.collection.find(
+            {"expires_at": {"$lt": now}}, {"input_files": 1, "result_file": 1}
+        ):
+            file_ids = list((job.get("input_files") or {}).values())
+            if job.get("result_file") is not None:
+                file_ids.append(job["result_file"])
+            await self._delete_files(file_ids)
+            await self.collection.delete_one({"_id": job["_id"]})
+
+    async def _delete_files(self, file_ids: list) -> None:
+        for file_id in file_ids:
+            try:
+                await self.files.delete(file_id)
+            except Exception as e:
+                # Already gone (another process got there first) or storage hiccup; the
+                # reaper retries through expires_at
+                logger.debug(f"Job file {file_id} not deleted: {e}")
+
+    # === CONSUMERS ===
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": job_id}, {"payload": 0})
+
+    async def read_result(self, job: Dict[str, Any]) -> bytes:
+        return await (await self.files.open_download_stream(job["result_file"])).read()
+
+    async def wait(self, job_id: str, timeout: float) -> None:
+        """
+        Return when the job finishes in this process or after `timeout`, whichever comes first.
+        Jobs run by another process are only noticed by the caller re-reading the document.
+        """
+        waiter = self._waiters.get(job_id)
+        if waiter is None:
+            waiter = self._waiters[job_id] = [asyncio.Event(), 0]
+        waiter[1] += 1
+        try:
+            await asyncio.wait_for(waiter[0].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiter[1] -= 1
+            if waiter[1] == 0 and self._waiters.get(job_id) is waiter:
+                del self._waiters[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers if self._tasks else 0,
+            "worker_id": self.worker_id,
+            "capacity": self.maxsize,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "requeued_after_worker_loss": self.requeued,
+            "waiting_clients": len(self._waiters),
+        }
+
+
+def serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """API shape of a job document: no payload, and a link instead of a file result."""
+    job_id = job["_id"]
+    out = {
+        "job_id": job_id,
+        "kind": job["kind"],
+        "status": job["status"],
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "status_url": f"/api/v1/jobs/{job_id}",
+        "events_url": f"/api/v1/jobs/{job_id}/events",
+    }
+    if job["status"] == "failed":
+        out["error"] = job.get("error")
+    if job["status"] == "succeeded":
+        if job.get("content_type"):
+            out["result_url"] = f"/api/v1/jobs/{job_id}/result"
+        else:
+            out["result"] = job.get("result")
+    return out
+
+
+job_queue = JobQueue()
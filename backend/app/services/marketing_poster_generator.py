@@ -1,19 +1,18 @@
-from google import genai
+import asyncio
 from google.genai import types
 from PIL import Image
 from io import BytesIO
-import os 
-from dotenv import load_dotenv
-load_dotenv()
+from app.utils.ai import GEMINI_IMAGE_MODEL, Target, gateway, get_genai_client
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=GEMINI_API_KEY)
-
-def generate_minimal_marketing_poster(image_bytes: bytes, product_name: str = "") -> bytes:
+def _to_jpeg(image_bytes: bytes) -> bytes:
     image_input = Image.open(BytesIO(image_bytes))
     img_byte_arr = BytesIO()
     image_input.save(img_byte_arr, format='JPEG')
-    img_byte_arr = img_byte_arr.getvalue()
+    return img_byte_arr.getvalue()
+
+async def generate_minimal_marketing_poster(image_bytes: bytes, product_name: str = "") -> bytes:
+    # Image decoding is CPU-bound; the Gemini call itself is async
+    img_byte_arr = await asyncio.to_thread(_to_jpeg, image_bytes)
 
     text_input = (
         "Using the provided product image, add a minimal, neat, and clean marketing tagline or phrase directly on the image. "
@@ -28,10 +27,13 @@ def generate_minimal_marketing_poster(image_bytes: bytes, product_name: str = ""
     ]
     content = types.Content(parts=parts)
 
-    response = client.models.generate_content(
-        model="gemini-2.0-flash-preview-image-generation",
-        contents=content,
-        config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+    client = get_genai_client()
+    response = await gateway.call(
+        [Target(f"gemini-image:{GEMINI_IMAGE_MODEL}", lambda: client.aio.models.generate_content(
+            model=GEMINI_IMAGE_MODEL,
+            contents=content,
+            config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+        ))]
     )
 
     for part in response.candidates[0].content.parts:
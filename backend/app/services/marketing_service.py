@@ -1,11 +1,12 @@
 
 from typing import Dict, Any
 import os
-from google import genai
 from google.genai import types
 from PIL import Image
 from io import BytesIO
 from dotenv import load_dotenv
+from app.utils.singleflight import SingleFlight, make_key
+from app.utils.ai import GEMINI_IMAGE_MODEL, GEMINI_MODEL, Target, gateway, get_genai_client, get_gemini_model
 load_dotenv()
 
 class MarketingService:
@@ -22,7 +23,7 @@ class MarketingService:
                     "artisan_id": artisan_id
                 }
             
-            client = genai.Client(api_key=GEMINI_API_KEY)
+            client = get_genai_client()
             text_input = (
                 "You are an expert marketing copywriter. "
                 "Given the following prompt, generate a catchy, engaging, and persuasive marketing statement for an artisan's handcrafted products. "
@@ -45,20 +46,23 @@ class MarketingService:
             
             content = types.Content(parts=parts)
             
-            # Try with image generation model first, fallback to text model
-            try:
-                response = client.models.generate_content(
-                    model="gemini-2.0-flash-preview-image-generation",
-                    contents=content,
-                    config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
-                )
-            except:
-                # Fallback to text-only model
-                response = client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=content,
-                    config=types.GenerateContentConfig(response_modalities=['TEXT'])
-                )
+            # Image generation model first; the text-only model runs only once the image model
+            # has failed or timed out, or while its circuit is open. No hedging: text-only output
+            # is a degraded result and would win every race against a 5-20s image generation.
+            response = await gateway.call(
+                [
+                    Target(f"gemini-image:{GEMINI_IMAGE_MODEL}", lambda: client.aio.models.generate_content(
+                        model=GEMINI_IMAGE_MODEL,
+                        contents=content,
+                        config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+                    )),
+                    Target(f"gemini:{GEMINI_MODEL}", lambda: client.aio.models.generate_content(
+                        model=GEMINI_MODEL,
+                        contents=content,
+                        config=types.GenerateContentConfig(response_modalities=['TEXT'])
+                    )),
+                ]
+            )
             
             # Extract text response
             marketing_content = ""
@@ -88,24 +92,28 @@ class MarketingService:
 
 
 
-from app.db import db
-from app.services.artisan_service import serialize_artisan
+from app.services.artisan_service import ArtisanService
+
+# Repeated clicks / concurrent requests for the same artisan share one Gemini call
+story_flight = SingleFlight("generate_story_for_artisan")
+
 
 async def generate_story_for_artisan(artisan_id: str, extra_info: str = "") -> Dict[str, Any]:
+    """Generate a story for an artisan; identical requests already in flight are coalesced."""
+    key = make_key(artisan_id.strip(), " ".join(extra_info.split()))
+    return await story_flight.do(key, lambda: _generate_story_for_artisan(artisan_id, extra_info))
+
+
+async def _generate_story_for_artisan(artisan_id: str, extra_info: str = "") -> Dict[str, Any]:
     """Fetch artisan by ID, combine with extra info, and generate a story using Gemini API."""
-    import google.generativeai as genai
     try:
-        from bson import ObjectId
         # Try to interpret as ObjectId, else fallback to user_id
-        artisan = None
-        if ObjectId.is_valid(artisan_id):
-            artisan = await db["artisans"].find_one({"_id": ObjectId(artisan_id)})
+        artisan = await ArtisanService.get_artisan_by_id(artisan_id)
         if not artisan:
             # Try user_id field
-            artisan = await db["artisans"].find_one({"user_id": artisan_id})
+            artisan = await ArtisanService.get_artisan_by_user_id(artisan_id)
         if not artisan:
             raise ValueError("Artisan not found for given ID or user_id")
-        artisan = serialize_artisan(artisan)
         # Gather all relevant artisan info
         name = artisan.get("name") or artisan.get("username") or "The artisan"
         location = artisan.get("location", "")
@@ -125,12 +133,11 @@ async def generate_story_for_artisan(artisan_id: str, extra_info: str = "") -> D
             "Keep the artisan's voice and details, but improve grammar, flow, and impact.\n\n"
             f"Artisan details:\n{context}\n\nStory:"
         )
-        GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-        if not GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY not set in environment variables.")
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
+        model = get_gemini_model(GEMINI_MODEL)
+        # Async call: the blocking one stalled the event loop, so concurrent requests could never overlap
+        response = await gateway.call(
+            [Target(f"gemini:{GEMINI_MODEL}", lambda: model.generate_content_async(prompt))]
+        )
         improved_story = response.text.strip() if hasattr(response, "text") else str(response).strip()
         return {
             "status": "success",
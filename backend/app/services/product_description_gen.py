@@ -1,15 +1,53 @@
 import os
 import asyncio
-from typing import List, Optional, Dict
-from groq import AsyncGroq
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Dict, Tuple
+from groq import AsyncGroq, RateLimitError
 from datetime import datetime
 import json
 import logging
+from app.utils.singleflight import SingleFlight, make_key
+from app.utils.ai import GROQ_MODEL, Target, gateway, get_groq_client
+from app.utils.rate_limit import TokenBucket
+from app.services.generation_cache import generation_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are an expert copywriter specializing in authentic Indian handicrafts and artisan products. You create compelling, culturally-sensitive product descriptions that highlight craftsmanship, tradition, and artistic value."
+
+# Groq quota for the model (free tier of llama-3.3-70b-versatile by default); set these to the
+# organisation's limits. Requests are paced against both buckets.
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "12000"))
+BULK_MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", "8"))
+RATE_LIMIT_RETRIES = 3
+# JSON answer size by target length, in tokens
+EXPECTED_COMPLETION_TOKENS = {"short": 250, "medium": 400, "long": 600}
+
+
+class GroqQuota:
+    """Requests-per-minute and tokens-per-minute buckets shared by every bulk job in the process."""
+
+    def __init__(self, rpm: float, tpm: float):
+        # Capacity of a few seconds' worth lets a job start promptly without bursting a minute's quota
+        self.requests = TokenBucket(rate=rpm / 60, capacity=max(1.0, rpm / 12))
+        self.tokens = TokenBucket(rate=tpm / 60, capacity=max(1.0, tpm / 12))
+
+    async def acquire(self, tokens: int) -> None:
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+    def pause(self, seconds: float) -> None:
+        self.requests.pause(seconds)
+        self.tokens.pause(seconds)
+
+    def stats(self) -> Dict:
+        return {"requests": self.requests.stats(), "tokens": self.tokens.stats()}
+
+
+groq_quota = GroqQuota(GROQ_RPM, GROQ_TPM)
+
 class ProductDescriptionGenerator:
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -18,12 +56,14 @@ class ProductDescriptionGenerator:
         Args:
             api_key: GroqCloud API key. If not provided, will try to get from environment.
         """
-        self.api_key = api_key or os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY must be provided either as parameter or environment variable")
-        
-        self.client = AsyncGroq(api_key=self.api_key)
-        self.model = "llama-3.3-70b-versatile"  # Fast and efficient model
+        if api_key:
+            self.api_key = api_key
+            self.client = AsyncGroq(api_key=api_key)
+        else:
+            # Shared, long-lived client: reuses warm connections across requests
+            self.client = get_groq_client()
+            self.api_key = self.client.api_key
+        self.model = GROQ_MODEL  # Fast and efficient model
     
     async def generate_product_description(
         self,
@@ -32,10 +72,15 @@ class ProductDescriptionGenerator:
         craft_type: Optional[str] = None,
         artisan_location: Optional[str] = None,
         target_length: str = "medium",
-        tone: str = "professional"
+        tone: str = "professional",
+        force_refresh: bool = False,
+        before_call: Optional[Callable[[], Awaitable[None]]] = None
     ) -> Dict[str, str]:
         """
         Generate a compelling product description using keywords and context.
+
+        Generation is deterministic (temperature 0), so results are cached by model + prompt
+        and served with `cached: True` until `force_refresh` asks for a new generation.
         
         Args:
             keywords: List of keywords describing the product
@@ -44,6 +89,8 @@ class ProductDescriptionGenerator:
             artisan_location: Location of the artisan (adds cultural context)
             target_length: "short" (50-100 words), "medium" (100-200 words), "long" (200-300 words)
             tone: "professional", "casual", "artistic", "traditional"
+            force_refresh: Skip the cache lookup and overwrite the entry with a fresh generation
+            before_call: Awaited only when Groq is actually called (e.g. to take rate-limit tokens)
         
         Returns:
             Dict containing generated description, title, and metadata
@@ -53,24 +100,37 @@ class ProductDescriptionGenerator:
             prompt = self._build_prompt(
                 keywords, product_name, craft_type, artisan_location, target_length, tone
             )
+
+            cache_key = generation_cache.key(self.model, SYSTEM_PROMPT, prompt)
+            if not force_refresh:
+                cached = await generation_cache.get(cache_key)
+                if cached:
+                    return {**cached, "keywords_used": keywords, "cached": True}
+            if before_call is not None:
+                await before_call()
             
             # Make the API call
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert copywriter specializing in authentic Indian handicrafts and artisan products. You create compelling, culturally-sensitive product descriptions that highlight craftsmanship, tradition, and artistic value."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.0,
-                max_tokens=1000,
-                top_p=1,
-                stream=False
+            messages = [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+            response = await gateway.call(
+                [Target(f"groq:{self.model}", lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.0,
+                    max_tokens=1000,
+                    top_p=1,
+                    stream=False
+                ))],
+                # Quota-paced (bulk) calls handle 429 themselves by pausing for Retry-After
+                retries=0 if before_call is not None else None
             )
             
             # Parse the response
@@ -80,7 +140,7 @@ class ProductDescriptionGenerator:
             try:
                 parsed_content = json.loads(content)
                 if isinstance(parsed_content, dict):
-                    return {
+                    result = {
                         "description": parsed_content.get("description", content),
                         "title": parsed_content.get("title", product_name or "Handcrafted Item"),
                         "short_description": parsed_content.get("short_description", ""),
@@ -88,19 +148,27 @@ class ProductDescriptionGenerator:
                         "generated_at": datetime.utcnow().isoformat(),
                         "keywords_used": keywords
                     }
+                else:
+                    result = None
             except json.JSONDecodeError:
-                pass
+                result = None
             
             # If not JSON, return the content as description
-            return {
-                "description": content,
-                "title": product_name or self._generate_title_from_keywords(keywords),
-                "short_description": content[:100] + "..." if len(content) > 100 else content,
-                "highlights": keywords,
-                "generated_at": datetime.utcnow().isoformat(),
-                "keywords_used": keywords
-            }
+            if result is None:
+                result = {
+                    "description": content,
+                    "title": product_name or self._generate_title_from_keywords(keywords),
+                    "short_description": content[:100] + "..." if len(content) > 100 else content,
+                    "highlights": keywords,
+                    "generated_at": datetime.utcnow().isoformat(),
+                    "keywords_used": keywords
+                }
+
+            await generation_cache.set(cache_key, self.model, result, refresh=force_refresh)
+            return {**result, "cached": False}
             
+        except RateLimitError:
+            raise  # let bulk generation back off instead of counting it as a failure
         except Exception as e:
             logger.error(f"Error generating product description: {str(e)}")
             raise Exception(f"Failed to generate product description: {str(e)}")
@@ -181,70 +249,113 @@ class ProductDescriptionGenerator:
         title = " ".join(word.capitalize() for word in main_keywords)
         return f"Handcrafted {title}"
     
+    def estimate_tokens(self, product: Dict) -> int:
+        """Rough prompt + completion size of one request, for the tokens-per-minute budget."""
+        prompt = self._build_prompt(
+            product.get("keywords", []), product.get("product_name"), product.get("craft_type"),
+            product.get("artisan_location"), product.get("target_length", "medium"),
+            product.get("tone", "professional")
+        )
+        return (len(SYSTEM_PROMPT) + len(prompt)) // 4 + EXPECTED_COMPLETION_TOKENS.get(
+            product.get("target_length", "medium"), EXPECTED_COMPLETION_TOKENS["medium"]
+        )
+
+    async def _generate_limited(self, product: Dict) -> Dict:
+        keywords = product.get("keywords")
+        if not isinstance(keywords, list) or not keywords:
+            raise ValueError("'keywords' must be a non-empty list")
+        tokens = self.estimate_tokens(product)
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                # Cached items return without touching the quota
+                return await self.generate_product_description(
+                    keywords=keywords,
+                    product_name=product.get("product_name"),
+                    craft_type=product.get("craft_type"),
+                    artisan_location=product.get("artisan_location"),
+                    target_length=product.get("target_length", "medium"),
+                    tone=product.get("tone", "professional"),
+                    force_refresh=bool(product.get("force_refresh", False)),
+                    before_call=lambda: groq_quota.acquire(tokens)
+                )
+            except RateLimitError as e:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise Exception(f"Failed to generate product description: {str(e)}")
+                # Our estimate ran ahead of the real quota: stop everyone for Retry-After
+                retry_after = e.response.headers.get("retry-after") if e.response is not None else None
+                try:
+                    pause = float(retry_after) if retry_after else 2.0 ** attempt
+                except ValueError:
+                    pause = 2.0 ** attempt
+                groq_quota.pause(pause)
+                logger.warning(f"Groq rate limited, pausing {pause:.1f}s")
+
+    async def iter_bulk_descriptions(
+        self,
+        products_data: List[Dict],
+        max_in_flight: int = BULK_MAX_IN_FLIGHT
+    ) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+        """
+        Yield (index, result, error) for each product as soon as it finishes.
+
+        Requests start as fast as the shared Groq quota allows, with at most `max_in_flight`
+        outstanding: a sliding window, so one slow item never holds up the next batch.
+        """
+        pending: Dict[asyncio.Task, int] = {}
+        next_index = 0
+        try:
+            while next_index < len(products_data) or pending:
+                while next_index < len(products_data) and len(pending) < max_in_flight:
+                    product = products_data[next_index]
+                    task = asyncio.ensure_future(self._generate_limited(product if isinstance(product, dict) else {}))
+                    pending[task] = next_index
+                    next_index += 1
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is not None:
+                        logger.error(f"Error processing product {index}: {str(task.exception())}")
+                        yield index, None, str(task.exception())
+                    else:
+                        yield index, task.result(), None
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def generate_bulk_descriptions(
         self,
         products_data: List[Dict],
-        batch_size: int = 5
+        max_in_flight: int = BULK_MAX_IN_FLIGHT
     ) -> List[Dict]:
         """
-        Generate descriptions for multiple products in batches.
+        Generate descriptions for multiple products, paced by the shared Groq quota.
         
         Args:
             products_data: List of dicts, each containing product information
-            batch_size: Number of products to process concurrently
+            max_in_flight: Most requests outstanding at once
         
         Returns:
-            List of generated descriptions with metadata
+            List of generated descriptions with metadata, in input order
         """
-        results = []
-        
-        # Process in batches to avoid rate limits
-        for i in range(0, len(products_data), batch_size):
-            batch = products_data[i:i + batch_size]
-            
-            # Create tasks for the batch
-            tasks = []
-            for product in batch:
-                task = self.generate_product_description(
-                    keywords=product.get("keywords", []),
-                    product_name=product.get("product_name"),
-                    craft_type=product.get("craft_type"),
-                    artisan_location=product.get("artisan_location"),
-                    target_length=product.get("target_length", "medium"),
-                    tone=product.get("tone", "professional")
-                )
-                tasks.append(task)
-            
-            # Execute batch
-            try:
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for j, result in enumerate(batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error processing product {i+j}: {str(result)}")
-                        results.append({
-                            "error": str(result),
-                            "product_index": i + j
-                        })
-                    else:
-                        results.append(result)
-                        
-            except Exception as e:
-                logger.error(f"Error processing batch {i//batch_size + 1}: {str(e)}")
-                # Add error entries for the whole batch
-                for j in range(len(batch)):
-                    results.append({
-                        "error": str(e),
-                        "product_index": i + j
-                    })
-            
-            # Small delay between batches to respect rate limits
-            if i + batch_size < len(products_data):
-                await asyncio.sleep(1)
-        
+        results: List[Optional[Dict]] = [None] * len(products_data)
+        async for index, result, error in self.iter_bulk_descriptions(products_data, max_in_flight):
+            results[index] = result if error is None else {"error": error, "product_index": index}
         return results
 
 
+# Concurrent requests for the same product share one Groq call
+description_flight = SingleFlight("generate_description")
+_default_generator: Optional[ProductDescriptionGenerator] = None
+
+
+def get_description_generator() -> ProductDescriptionGenerator:
+    """Generator on the shared Groq client, created on first use."""
+    global _default_generator
+    if _default_generator is None:
+        _default_generator = ProductDescriptionGenerator()
+    return _default_generator
+
+
 # Convenience functions for easy use
 async def generate_description(
     keywords: List[str],
@@ -252,17 +363,33 @@ async def generate_description(
     craft_type: Optional[str] = None,
     artisan_location: Optional[str] = None,
     target_length: str = "medium",
-    tone: str = "professional"
+    tone: str = "professional",
+    force_refresh: bool = False
 ) -> Dict[str, str]:
     """
     Convenience function to generate a single product description.
+    Identical requests already in flight are coalesced into one call.
     """
-    generator = ProductDescriptionGenerator()
-    return await generator.generate_product_description(
-        keywords=keywords,
-        product_name=product_name,
-        craft_type=craft_type,
-        artisan_location=artisan_location,
-        target_length=target_length,
-        tone=tone
+    generator = get_description_generator()
+    prompt = generator._build_prompt(keywords, product_name, craft_type, artisan_location, target_length, tone)
+    # Same identity as the generation cache (model + exact prompt), plus the request fields the
+    # result echoes back, so only requests that would get identical responses share a call
+    key = make_key(
+        generation_cache.key(generator.model, SYSTEM_PROMPT, prompt),
+        keywords,
+        product_name,
+        force_refresh,
     )
+
+    async def generate():
+        return await generator.generate_product_description(
+            keywords=keywords,
+            product_name=product_name,
+            craft_type=craft_type,
+            artisan_location=artisan_location,
+            target_length=target_length,
+            tone=tone,
+            force_refresh=force_refresh
+        )
+
+    return await description_flight.do(key, generate)
@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Optional
+from app.db import db
+from app.services.artisan_service import serialize_product
+from app.utils.pagination import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, encode_cursor
+
+# Lower bounds of the price facet buckets; the last bucket is open-ended
+PRICE_BOUNDARIES = [0, 500, 1000, 2500, 5000, 10000]
+
+
+def _price_ranges(buckets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    upper = dict(zip(PRICE_BOUNDARIES, PRICE_BOUNDARIES[1:]))
+    ranges = []
+    for bucket in buckets:
+        if bucket["_id"] == "unpriced":
+            ranges.append({"min": None, "max": None, "count": bucket["count"]})
+        else:
+            ranges.append({"min": bucket["_id"], "max": upper.get(bucket["_id"]), "count": bucket["count"]})
+    return ranges
+
+
+class ProductService:
+    @staticmethod
+    async def search_products(
+        q: str,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Relevance-ranked full-text search over product name, description and category.
+
+        Runs as a single aggregation on the `product_text` index. The first page also returns
+        category counts and price-range buckets for the whole match set; later pages (with a
+        cursor) skip the facets and only continue the (score, _id) keyset.
+        """
+        if not q or not q.strip():
+            raise ValueError("Search query must not be empty")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        match: Dict[str, Any] = {"$text": {"$search": q}}
+        if category:
+            match["category"] = category
+        if min_price is not None or max_price is not None:
+            match["price"] = {}
+            if min_price is not None:
+                match["price"]["$gte"] = min_price
+            if max_price is not None:
+                match["price"]["$lte"] = max_price
+
+        results_stages: List[Dict[str, Any]] = []
+        if cursor:
+            results_stages.append({"$match": decode_cursor(cursor, "score")})
+        results_stages += [
+            {"$sort": {"score": -1, "_id": -1}},
+            {"$limit": limit + 1},
+        ]
+
+        facets: Dict[str, Any] = {"results": results_stages}
+        if not cursor:
+            facets["categories"] = [
+                {"$match": {"category": {"$nin": [None, ""]}}},
+                {"$sortByCount": "$category"},
+            ]
+            facets["price_ranges"] = [
+                {"$bucket": {
+                    "groupBy": "$price",
+                    "boundaries": PRICE_BOUNDARIES + [float("inf")],
+                    "default": "unpriced",
+                    "output": {"count": {"$sum": 1}}
+                }},
+            ]
+            facets["total"] = [{"$count": "count"}]
+
+        pipeline = [
+            {"$match": match},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$facet": facets},
+        ]
+        out = (await db["products"].aggregate(pipeline).to_list(length=1))[0]
+
+        docs = out["results"]
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1], "score")
+
+        page: Dict[str, Any] = {
+            "results": [serialize_product(doc) for doc in docs],
+            "count": len(docs),
+            "next_cursor": next_cursor,
+        }
+        if not cursor:
+            page["total"] = out["total"][0]["count"] if out["total"] else 0
+            page["facets"] = {
+                "categories": [{"category": c["_id"], "count": c["count"]} for c in out["categories"]],
+                "price_ranges": _price_ranges(out["price_ranges"]),
+            }
+        return page
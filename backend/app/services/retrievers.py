@@ -0,0 +1,524 @@
+import os
+import json
+import time
+import asyncio
+import glob
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from app.db import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the local index is then single-process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# === CONFIG ===
+COLLECTION_NAME = "knowledge_base"
+INDEX_NAME = "chat"
+EMBEDDING_DIM = 384
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# "atlas" uses the $vectorSearch index; "local" keeps an in-process float32 index;
+# "hybrid" fuses $text (lexical) hits with the vector backend named by RAG_HYBRID_VECTOR
+RAG_RETRIEVER = os.getenv("RAG_RETRIEVER", "atlas").lower()
+RAG_HYBRID_VECTOR = os.getenv("RAG_HYBRID_VECTOR", "atlas").lower()
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+# Each side of a hybrid search contributes this many candidates per requested hit
+HYBRID_CANDIDATES_PER_HIT = 4
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(BACKEND_DIR, ".vector_index"))
+# Where a missing local index is built from: "mongo" (knowledge_base) or "dumps" (notebook JSON files)
+LOCAL_INDEX_SOURCE = os.getenv("LOCAL_INDEX_SOURCE", "mongo").lower()
+DUMPS_GLOB = os.path.join(BACKEND_DIR, "notebooks", "output_embeddings_list_*.json")
+# How often a search may check Mongo for chunks added since the last refresh
+LOCAL_REFRESH_INTERVAL = float(os.getenv("LOCAL_INDEX_REFRESH_INTERVAL", "60"))
+
+
+def _chunk_text(doc: Dict[str, Any]) -> str:
+    return doc.get("text") or doc.get("chunk") or ""
+
+
+def _hit_projection(score: Dict[str, Any], with_vectors: bool) -> Dict[str, Any]:
+    # `score` is the $meta expression itself, e.g. {"$meta": "textScore"}
+    projection = {"_id": 1, "text": 1, "chunk": 1, "score": score}
+    if with_vectors:
+        projection["embedding"] = 1
+    return projection
+
+
+def _hit(doc: Dict[str, Any], with_vectors: bool) -> Dict[str, Any]:
+    hit = {"_id": doc["_id"], "score": doc["score"], "text": _chunk_text(doc)}
+    if with_vectors and doc.get("embedding"):
+        hit["embedding"] = doc["embedding"]
+    return hit
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class Retriever:
+    """Finds the knowledge-base chunks closest to a query embedding."""
+
+    name = "base"
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 3,
+        query: Optional[str] = None,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Return up to `top_k` hits as `{"_id", "score", "text"}`, best first. `query` is the raw
+        text, used by retrievers with a lexical side. `with_vectors` adds each chunk's
+        `embedding`, for re-ranking that compares chunks with each other.
+        """
+        raise NotImplementedError
+
+    async def refresh(self) -> int:
+        """Pick up chunks added since the last call; returns how many were added."""
+        return 0
+
+
+class AtlasVectorRetriever(Retriever):
+    """MongoDB Atlas `$vectorSearch` over the `chat` index."""
+
+    name = "atlas"
+
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else db[COLLECTION_NAME]
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 3,
+        query: Optional[str] = None,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": INDEX_NAME,
+                    "queryVector": query_vector,
+                    "path": "embedding",
+                    "numCandidates": max(50, top_k * 10),
+                    "limit": top_k,
+                }
+            },
+            # The chunk text comes back with the hit; no follow-up find_one per result
+            {"$project": _hit_projection({"$meta": "vectorSearchScore"}, with_vectors)},
+        ]
+
+        results = await self.collection.aggregate(pipeline).to_list(length=top_k)
+        return [_hit(doc, with_vectors) for doc in results]
+
+
+async def text_search(collection, query: str, limit: int, with_vectors: bool = False) -> List[Dict[str, Any]]:
+    """Lexical hits from the `knowledge_base_text` index, best textScore first."""
+    if not query or not query.strip():
+        return []
+    pipeline = [
+        {"$match": {"$text": {"$search": query}}},
+        {"$project": _hit_projection({"$meta": "textScore"}, with_vectors)},
+        {"$sort": {"score": {"$meta": "textScore"}}},
+        {"$limit": limit},
+    ]
+    results = await collection.aggregate(pipeline).to_list(length=limit)
+    return [_hit(doc, with_vectors) for doc in results]
+
+
+def reciprocal_rank_fusion(*rankings: List[Dict[str, Any]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge ranked hit lists: each hit scores sum(1 / (k + rank)) over the lists it appears in.
+    Only ranks are used, so textScore and cosine never need to be put on a common scale.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = str(hit["_id"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {"_id": hit["_id"], "score": 0.0, "text": hit["text"]}
+            if "embedding" in hit and "embedding" not in entry:
+                entry["embedding"] = hit["embedding"]
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)
+
+
+class HybridRetriever(Retriever):
+    """
+    Runs a `$text` search and a vector search concurrently and fuses them with reciprocal rank
+    fusion, so exact scheme names and acronyms ("PM Vishwakarma", "GI tag") are found even when
+    the embedding misses them. Falls back to the vector hits alone if the text search fails.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, vector: Retriever, collection=None):
+        self.vector = vector
+        self.collection = collection if collection is not None else db[COLLECTION_NAME]
+
+    async def refresh(self) -> int:
+        return await self.vector.refresh()
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 3,
+        query: Optional[str] = None,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        candidates = top_k * HYBRID_CANDIDATES_PER_HIT
+        vector_hits, text_hits = await asyncio.gather(
+            self.vector.search(query_vector, top_k=candidates, with_vectors=with_vectors),
+            text_search(self.collection, query or "", candidates, with_vectors=with_vectors),
+            return_exceptions=True,
+        )
+        if isinstance(vector_hits, Exception):
+            raise vector_hits
+        if isinstance(text_hits, Exception):
+            logger.warning(f"Lexical search failed, using vector hits only: {text_hits}")
+            text_hits = []
+        return reciprocal_rank_fusion(vector_hits, text_hits)[:top_k]
+
+
+class _LocalIndex(NamedTuple):
+    """One consistent view of the on-disk index; swapped as a whole so searches never mix two."""
+    matrix: np.ndarray
+    ids: List[str]
+    texts: List[str]
+    meta: Dict[str, Any]
+
+
+class LocalVectorRetriever(Retriever):
+    """
+    Exact cosine search over an on-disk float32 matrix, memory-mapped so several workers share
+    the page cache instead of each holding a copy.
+
+    Files in `index_dir`:
+      vectors.<generation>.f32   row-major (count x dim) L2-normalized float32
+      chunks.<generation>.jsonl  one {"_id", "text"} line per row
+      meta.json                  {"dim", "count", "chunks_bytes", "generation", "source", "last_id"}
+      .lock                      held (flock) by the single process writing at a time
+
+    Writers append rows first and replace meta.json last, atomically, so readers only ever
+    see the rows meta.json counts; bytes past that (a writer that died mid-append) are
+    truncated by the next writer. A rebuild writes a new generation and deletes the old files
+    once meta.json points at it, so workers still mapping the old ones are unaffected. All
+    file I/O runs in a thread, off the event loop.
+    """
+
+    name = "local"
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, collection=None, dim: int = EMBEDDING_DIM):
+        self.index_dir = index_dir
+        self.collection = collection if collection is not None else db[COLLECTION_NAME]
+        self.dim = dim
+        self.index: Optional[_LocalIndex] = None
+        self._lock = asyncio.Lock()
+        self._last_refresh = 0.0
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.index.meta if self.index is not None else {}
+
+    # --- files ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _files(self, meta: Dict[str, Any]) -> Tuple[str, str]:
+        generation = meta.get("generation")
+        if generation is None:  # indexes written before generations existed
+            return self._path("vectors.f32"), self._path("chunks.jsonl")
+        return self._path(f"vectors.{generation}.f32"), self._path(f"chunks.{generation}.jsonl")
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp = self._path(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path("meta.json"))
+
+    def _acquire(self, wait: bool = True) -> Optional[int]:
+        """Take the cross-process writer lock; None when `wait` is False and someone holds it."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        fd = os.open(self._path(".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            return fd  # no flock on this platform: single-process use only
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    @staticmethod
+    def _release(fd: int) -> None:
+        os.close(fd)  # closing drops the flock
+
+    # --- reading ---
+    def load(self) -> bool:
+        """Map the committed index from disk. Returns False when there is none yet."""
+        meta = self._read_meta()
+        if meta is None:
+            return False
+        dim = meta.get("dim", self.dim)
+        count = meta.get("count", 0)
+        vectors_path, chunks_path = self._files(meta)
+        with open(chunks_path, "rb") as f:
+            data = f.read(meta["chunks_bytes"]) if "chunks_bytes" in meta else f.read()
+        lines = data.splitlines()[:count]
+        chunks = [json.loads(line) for line in lines]
+        if len(chunks) != count:
+            raise ValueError(f"Local vector index is inconsistent: meta counts {count} rows, chunks file has {len(chunks)}")
+        if count:
+            matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(count, dim))
+        else:
+            matrix = np.zeros((0, dim), dtype=np.float32)
+        self.dim = dim
+        self.index = _LocalIndex(matrix, [c["_id"] for c in chunks], [c["text"] for c in chunks], meta)
+        return True
+
+    def _reload_if_changed(self) -> bool:
+        meta = self._read_meta()
+        if meta is None or meta == self.meta:
+            return False
+        return self.load()
+
+    # --- writing (only while holding the writer lock) ---
+    def _begin(self) -> Optional[Dict[str, Any]]:
+        """Committed meta, with any uncommitted bytes a dead writer left behind cut off."""
+        meta = self._read_meta()
+        if meta is None:
+            return None
+        vectors_path, chunks_path = self._files(meta)
+        with open(vectors_path, "ab") as f:
+            f.truncate(meta.get("count", 0) * meta.get("dim", self.dim) * 4)
+        if "chunks_bytes" not in meta:
+            meta["chunks_bytes"] = os.path.getsize(chunks_path)
+        with open(chunks_path, "ab") as f:
+            f.truncate(meta["chunks_bytes"])
+        return meta
+
+    def _new_generation(self, source: str) -> Dict[str, Any]:
+        meta = {
+            "dim": self.dim, "count": 0, "chunks_bytes": 0,
+            "generation": f"{int(time.time() * 1000)}-{os.getpid()}",
+            "source": source, "last_id": None,
+        }
+        for path in self._files(meta):
+            open(path, "wb").close()
+        return meta
+
+    def _append(self, meta: Dict[str, Any], rows: Iterable[Tuple[str, str, List[float]]]) -> int:
+        """Append (id, text, embedding) rows to the files; `meta` is updated but not written."""
+        dim = meta.get("dim", self.dim)
+        lines, vectors = [], []
+        for chunk_id, text, embedding in rows:
+            if len(embedding) != dim:
+                logger.warning(f"Skipping chunk {chunk_id}: embedding has {len(embedding)} dims, expected {dim}")
+                continue
+            lines.append((json.dumps({"_id": chunk_id, "text": text}, ensure_ascii=False) + "\n").encode("utf-8"))
+            vectors.append(embedding)
+        if not lines:
+            return 0
+        block = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        vectors_path, chunks_path = self._files(meta)
+        with open(vectors_path, "ab") as f:
+            f.write(block.tobytes())
+        with open(chunks_path, "ab") as f:
+            for line in lines:
+                f.write(line)
+        meta["count"] = meta.get("count", 0) + len(lines)
+        meta["chunks_bytes"] = meta.get("chunks_bytes", 0) + sum(len(line) for line in lines)
+        return len(lines)
+
+    def _commit(self, meta: Dict[str, Any]) -> None:
+        """Publish `meta` (rows become visible), drop files of older generations and reload."""
+        self._write_meta(meta)
+        keep = set(self._files(meta))
+        for path in glob.glob(self._path("vectors.*")) + glob.glob(self._path("chunks.*")):
+            if path not in keep:
+                try:
+                    os.remove(path)  # processes still mapping it keep their copy until they reload
+                except OSError:
+                    pass
+        self.load()
+
+    # --- building ---
+    def _build_from_dumps_locked(self, paths: Optional[List[str]]) -> int:
+        meta = self._new_generation("dumps")
+        written = 0
+        for path in sorted(paths or glob.glob(DUMPS_GLOB)):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data = [data]
+            written += self._append(meta, (
+                (f"{stem}:{doc.get('id', i)}", _chunk_text(doc), doc.get("embedding") or [])
+                for i, doc in enumerate(data)
+            ))
+        self._commit(meta)
+        return written
+
+    def build_from_dumps(self, paths: Optional[List[str]] = None) -> int:
+        """Rebuild from the notebook `output_embeddings_list_*.json` dumps."""
+        fd = self._acquire()
+        try:
+            return self._build_from_dumps_locked(paths)
+        finally:
+            self._release(fd)
+
+    async def _pull_from_mongo(self, meta: Dict[str, Any], batch_size: int = 1000) -> int:
+        after = meta.get("last_id")
+        query = {"_id": {"$gt": ObjectId(after)}} if after else {}
+        cursor = self.collection.find(query, {"text": 1, "chunk": 1, "embedding": 1}).sort("_id", 1)
+        written, batch = 0, []
+        async for doc in cursor:
+            batch.append((str(doc["_id"]), _chunk_text(doc), doc.get("embedding") or []))
+            meta["last_id"] = str(doc["_id"])
+            if len(batch) >= batch_size:
+                written += await asyncio.to_thread(self._append, meta, batch)
+                batch = []
+        if batch:
+            written += await asyncio.to_thread(self._append, meta, batch)
+        return written
+
+    async def _build_from_mongo_locked(self) -> int:
+        meta = await asyncio.to_thread(self._new_generation, "mongo")
+        written = await self._pull_from_mongo(meta)
+        await asyncio.to_thread(self._commit, meta)
+        return written
+
+    async def build_from_mongo(self) -> int:
+        """Rebuild from every chunk in the knowledge_base collection."""
+        fd = await asyncio.to_thread(self._acquire)
+        try:
+            return await self._build_from_mongo_locked()
+        finally:
+            self._release(fd)
+
+    async def ensure_loaded(self) -> None:
+        if self.index is not None:
+            return
+        async with self._lock:
+            if self.index is not None or await asyncio.to_thread(self.load):
+                return
+            fd = await asyncio.to_thread(self._acquire)
+            try:
+                # Another worker may have built it while we waited for the lock
+                if await asyncio.to_thread(self.load):
+                    return
+                if LOCAL_INDEX_SOURCE == "dumps":
+                    count = await asyncio.to_thread(self._build_from_dumps_locked, None)
+                else:
+                    count = await self._build_from_mongo_locked()
+                logger.info(f"Built local vector index with {count} chunks from {self.meta['source']}")
+                self._last_refresh = time.monotonic()
+            finally:
+                self._release(fd)
+
+    async def refresh(self, wait: bool = False) -> int:
+        """
+        Append chunks inserted into knowledge_base after the last one indexed. If another
+        process is already writing (and `wait` is False), just pick up what it has committed.
+        """
+        await self.ensure_loaded()
+        async with self._lock:
+            self._last_refresh = time.monotonic()
+            fd = await asyncio.to_thread(self._acquire, wait)
+            if fd is None:
+                await asyncio.to_thread(self._reload_if_changed)
+                return 0
+            try:
+                meta = await asyncio.to_thread(self._begin)
+                if meta is None or meta.get("source") != "mongo":
+                    await asyncio.to_thread(self._reload_if_changed)
+                    return 0  # dump-built indexes do not track the collection
+                written = await self._pull_from_mongo(meta)
+                if written or meta.get("last_id") != self.meta.get("last_id"):
+                    await asyncio.to_thread(self._commit, meta)
+                else:
+                    await asyncio.to_thread(self._reload_if_changed)
+                return written
+            finally:
+                self._release(fd)
+
+    # --- search ---
+    def top_k(self, query_vector: List[float], top_k: int, index: Optional[_LocalIndex] = None) -> List[Tuple[int, float]]:
+        """(row, cosine score) for the best `top_k` rows, best first."""
+        matrix = (index or self.index).matrix
+        count = matrix.shape[0]
+        if count == 0:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+        scores = matrix @ q
+        k = min(top_k, count)
+        # argpartition is O(n); only the k winners get sorted
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(scores[i])) for i in best]
+
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 3,
+        query: Optional[str] = None,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        await self.ensure_loaded()
+        if time.monotonic() - self._last_refresh > LOCAL_REFRESH_INTERVAL:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Local vector index refresh failed: {e}")
+        index = self.index
+        hits = []
+        for row, score in self.top_k(query_vector, top_k, index):
+            hit = {"_id": index.ids[row], "score": score, "text": index.texts[row]}
+            if with_vectors:
+                hit["embedding"] = index.matrix[row]
+            hits.append(hit)
+        return hits
+
+
+_retriever: Optional[Retriever] = None
+
+
+def _vector_retriever(kind: str) -> Retriever:
+    if kind == "local":
+        return LocalVectorRetriever()
+    if kind == "atlas":
+        return AtlasVectorRetriever()
+    raise ValueError(f"Unknown vector retriever '{kind}', expected 'atlas' or 'local'")
+
+
+def get_retriever() -> Retriever:
+    """The retriever selected by RAG_RETRIEVER, created on first use."""
+    global _retriever
+    if _retriever is None:
+        if RAG_RETRIEVER == "hybrid":
+            _retriever = HybridRetriever(_vector_retriever(RAG_HYBRID_VECTOR))
+        else:
+            _retriever = _vector_retriever(RAG_RETRIEVER)
+    return _retriever
@@ -0,0 +1,406 @@
+"""
+Process-wide LLM clients and the gateway every model call goes through.
+
+Every provider client is created once, on first use, and reused for the life of the worker, so
+back-to-back calls ride on already-open keep-alive connections instead of paying DNS, TCP and
+TLS setup again. Call `close_ai_clients()` on shutdown.
+
+`gateway.call(...)` wraps each upstream call with a per-provider timeout, jittered retries on
+transient errors, a circuit breaker per provider/model, ordered fallbacks and optional hedging.
+"""
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_IMAGE_MODEL = "gemini-2.0-flash-preview-image-generation"
+
+# Pool tuning shared by the HTTP-based clients. Provider edges close idle connections after
+# roughly a minute or two, so keeping them for longer than that gains nothing.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "90"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+
+_groq_client = None
+_groq_http: Optional[httpx.AsyncClient] = None
+_genai_client = None
+_generativeai_configured = False
+_gemini_models: Dict[str, object] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+def _require(name: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} must be set in environment variables")
+    return value
+
+
+def get_groq_client():
+    """Shared `AsyncGroq` client on a tuned keep-alive pool."""
+    global _groq_client, _groq_http
+    if _groq_client is None:
+        from groq import AsyncGroq, DefaultAsyncHttpxClient
+
+        _groq_http = DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout())
+        # Retries are the gateway's job; SDK retries underneath would multiply them
+        _groq_client = AsyncGroq(api_key=_require("GROQ_API_KEY"), http_client=_groq_http, max_retries=0)
+    return _groq_client
+
+
+def get_genai_client():
+    """Shared `google.genai` client (sync `models` and async `aio.models`) with pooled connections."""
+    global _genai_client
+    if _genai_client is None:
+        from google import genai
+        from google.genai import types
+
+        # With aiohttp installed the SDK sends `aio` calls through its own aiohttp session and
+        # drops pool options it does not recognise. Handing it an httpx transport is the
+        # supported way to opt out, so async calls use the same tuned pool as sync ones.
+        async_transport = httpx.AsyncHTTPTransport(limits=_limits())
+        _genai_client = genai.Client(
+            api_key=_require("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(
+                client_args={"limits": _limits()},
+                async_client_args={"transport": async_transport},
+            ),
+        )
+    return _genai_client
+
+
+async def _close_genai_client(client) -> None:
+    # google-genai 1.38 has no public close; shut down the sessions its API client holds
+    api_client = client._api_client
+    await api_client._async_httpx_client.aclose()
+    api_client._httpx_client.close()
+    session = getattr(api_client, "_aiohttp_session", None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def get_gemini_model(model_name: str = GEMINI_MODEL):
+    """
+    Cached `google.generativeai` model. The SDK keeps one gRPC channel per `configure()`, so
+    configuring once and reusing model objects keeps that channel warm.
+    """
+    global _generativeai_configured
+    import google.generativeai as generativeai
+
+    if not _generativeai_configured:
+        generativeai.configure(api_key=_require("GEMINI_API_KEY"))
+        _generativeai_configured = True
+    model = _gemini_models.get(model_name)
+    if model is None:
+        model = _gemini_models[model_name] = generativeai.GenerativeModel(model_name)
+    return model
+
+
+async def close_ai_clients() -> None:
+    global _groq_client, _groq_http, _genai_client
+    if _groq_client is not None:
+        await _groq_client.close()
+        _groq_client, _groq_http = None, None
+    if _genai_client is not None:
+        await _close_genai_client(_genai_client)
+        _genai_client = None
+
+
+# === GATEWAY ===
+# Seconds allowed for one attempt, by provider (the part of a target name before ":")
+PROVIDER_TIMEOUTS = {
+    "groq": float(os.getenv("LLM_TIMEOUT_GROQ", "30")),
+    "gemini": float(os.getenv("LLM_TIMEOUT_GEMINI", "30")),
+    "gemini-image": float(os.getenv("LLM_TIMEOUT_GEMINI_IMAGE", "90")),
+    "hf": float(os.getenv("LLM_TIMEOUT_HF", "15")),
+}
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# A hedge starts once the primary has been running longer than this percentile of its recent
+# latencies; until enough samples exist, after HEDGE_DEFAULT_DELAY seconds
+HEDGE_PERCENTILE = int(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "4"))
+LATENCY_WINDOW = 200
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class Target(NamedTuple):
+    """
+    One way to serve a call: `name` is "provider:model", `call` starts a fresh attempt.
+    `hedge_after` seeds the hedge delay (seconds) until the target has latency samples of its own.
+    """
+    name: str
+    call: Callable[[], Awaitable[Any]]
+    hedge_after: Optional[float] = None
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"{name} is temporarily disabled after repeated failures")
+        self.name = name
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection failures, 408/429 and 5xx; anything else is the caller's problem."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    try:
+        from groq import APIConnectionError
+        if isinstance(exc, APIConnectionError):
+            return True
+    except ImportError:
+        pass
+    status = _status(exc)
+    return status is not None and status in RETRYABLE_STATUS
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    # groq and our HF errors carry `status_code`; google.genai / api_core errors carry `code`
+    for attr in ("status_code", "code"):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+class CircuitBreaker:
+    """
+    Closed: calls flow. After `failure_threshold` consecutive transient failures it opens and
+    calls are refused for `reset_timeout` seconds; then one probe call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """The admitted call ended without telling us anything about the provider's health."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class _TargetState:
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def percentile(self, pct: int) -> Optional[float]:
+        if len(self.latencies) < 2:
+            return None
+        return statistics.quantiles(self.latencies, n=100)[pct - 1]
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "circuit": self.breaker.state,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "rejected_by_circuit": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class LLMGateway:
+    def __init__(self):
+        self._states: Dict[str, _TargetState] = {}
+
+    def _state(self, name: str) -> _TargetState:
+        state = self._states.get(name)
+        if state is None:
+            state = self._states[name] = _TargetState()
+        return state
+
+    @staticmethod
+    def _timeout(name: str, override: Optional[float]) -> float:
+        if override is not None:
+            return override
+        return PROVIDER_TIMEOUTS.get(name.split(":", 1)[0], float(os.getenv("LLM_TIMEOUT", "60")))
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _run_target(self, target: Target, timeout: Optional[float], retries: int) -> Any:
+        state = self._state(target.name)
+        if not state.breaker.allow():
+            state.rejected += 1
+            raise CircuitOpenError(target.name)
+        try:
+            for attempt in range(retries + 1):
+                state.attempts += 1
+                started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(target.call(), self._timeout(target.name, timeout))
+                except Exception as e:
+                    if not is_retryable(e):
+                        state.breaker.release()
+                        raise
+                    state.failures += 1
+                    if attempt == retries:
+                        # 429 means throttled, not down: it should not open the circuit
+                        if _status(e) == 429:
+                            state.breaker.release()
+                        else:
+                            state.breaker.record_failure()
+                        raise
+                    state.retries += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                state.latencies.append(time.monotonic() - started)
+                state.successes += 1
+                state.breaker.record_success()
+                return result
+        except asyncio.CancelledError:
+            # Says nothing about the provider (hedged away, caller gone or outer timeout);
+            # _run_hedged records the one case that carries latency information
+            state.breaker.release()
+            raise
+
+    async def _run_in_order(self, targets: List[Target], timeout: Optional[float], retries: int) -> Any:
+        error: Optional[BaseException] = None
+        for target in targets:
+            try:
+                return await self._run_target(target, timeout, retries)
+            except Exception as e:
+                error = e  # fall through to the next target
+        raise error
+
+    def _hedge_delay(self, target: Target) -> float:
+        state = self._state(target.name)
+        if len(state.latencies) >= HEDGE_MIN_SAMPLES:
+            return state.percentile(HEDGE_PERCENTILE)
+        return target.hedge_after if target.hedge_after is not None else HEDGE_DEFAULT_DELAY
+
+    async def _run_hedged(self, targets: List[Target], timeout: Optional[float], retries: int) -> Any:
+        primary, rest = targets[0], targets[1:]
+        started = time.monotonic()
+        tasks = [asyncio.ensure_future(self._run_target(primary, timeout, retries))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(primary))
+            if done:
+                if tasks[0].exception() is None:
+                    return tasks[0].result()
+                return await self._run_in_order(rest, timeout, retries)
+
+            # Primary is slower than usual: race it against the fallbacks
+            self._state(primary.name).hedges += 1
+            hedge = asyncio.ensure_future(self._run_in_order(rest, timeout, retries))
+            tasks.append(hedge)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            state = self._state(primary.name)
+                            state.hedge_wins += 1
+                            if not tasks[0].done():
+                                # The hedged-away primary would have taken longer than it ran.
+                                # Record twice the elapsed time so the hedge delay keeps growing
+                                # until it exceeds the primary's real latency; without a sample it
+                                # would stay at its default for a target always slower than that
+                                state.latencies.append(2 * (time.monotonic() - started))
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(
+        self,
+        targets: Iterable[Target],
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        hedge: bool = False
+    ) -> Any:
+        """
+        Run the first target, falling back to the next ones in order when it fails or its
+        circuit is open. With `hedge=True` the fallbacks are also started if the primary runs
+        past its usual latency, and whichever succeeds first wins, so only hedge between targets
+        that produce equivalent output; a degraded fallback belongs in plain ordered fallback.
+        Raises the last error when every target fails.
+        """
+        targets = list(targets)
+        if not targets:
+            raise ValueError("at least one target is required")
+        retries = LLM_RETRIES if retries is None else retries
+        if hedge and len(targets) > 1:
+            return await self._run_hedged(targets, timeout, retries)
+        return await self._run_in_order(targets, timeout, retries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: state.stats() for name, state in self._states.items()}
+
+
+gateway = LLMGateway()
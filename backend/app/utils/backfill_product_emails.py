@@ -0,0 +1,41 @@
+"""
+One-off migration: stamp `artisan_email` on existing products so the by-email product
+routes can answer from the products collection alone.
+
+Run from the backend directory:
+    python -m app.utils.backfill_product_emails
+"""
+import asyncio
+from pymongo import UpdateMany
+from app.db import db
+from app.utils.indexes import ensure_indexes
+
+BATCH_SIZE = 500
+
+
+async def backfill_product_emails() -> int:
+    ops = []
+    updated = 0
+    async for artisan in db["artisans"].find({"email": {"$ne": None}}, {"user_id": 1, "email": 1}):
+        ops.append(UpdateMany(
+            {"artisan_user_id": artisan["user_id"], "artisan_email": {"$ne": artisan["email"]}},
+            {"$set": {"artisan_email": artisan["email"]}}
+        ))
+        if len(ops) >= BATCH_SIZE:
+            result = await db["products"].bulk_write(ops, ordered=False)
+            updated += result.modified_count
+            ops = []
+    if ops:
+        result = await db["products"].bulk_write(ops, ordered=False)
+        updated += result.modified_count
+    return updated
+
+
+async def main():
+    await ensure_indexes()
+    updated = await backfill_product_emails()
+    print(f"Stamped artisan_email on {updated} product documents")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
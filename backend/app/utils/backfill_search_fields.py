@@ -0,0 +1,41 @@
+"""
+One-off migration: populate `skills_norm`/`location_norm` on existing artisan documents
+and create the search indexes.
+
+Run from the backend directory:
+    python -m app.utils.backfill_search_fields
+"""
+import asyncio
+from pymongo import UpdateOne
+from app.db import db
+from app.utils.indexes import ensure_indexes
+from app.utils.search import artisan_search_fields
+
+BATCH_SIZE = 500
+
+
+async def backfill_search_fields() -> int:
+    collection = db["artisans"]
+    ops = []
+    updated = 0
+    async for artisan in collection.find({}, {"skills": 1, "location": 1}):
+        fields = artisan_search_fields(artisan.get("skills"), artisan.get("location"))
+        ops.append(UpdateOne({"_id": artisan["_id"]}, {"$set": fields}))
+        if len(ops) >= BATCH_SIZE:
+            result = await collection.bulk_write(ops, ordered=False)
+            updated += result.modified_count
+            ops = []
+    if ops:
+        result = await collection.bulk_write(ops, ordered=False)
+        updated += result.modified_count
+    return updated
+
+
+async def main():
+    await ensure_indexes()
+    updated = await backfill_search_fields()
+    print(f"Backfilled search fields on {updated} artisan documents")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+"""
+Build (or incrementally refresh) the local vector index used when RAG_RETRIEVER=local.
+
+Run from the backend directory:
+    python -m app.utils.build_vector_index              # full rebuild from knowledge_base
+    python -m app.utils.build_vector_index --refresh    # append chunks added since the last build
+    python -m app.utils.build_vector_index --from-dumps # rebuild from notebooks/output_embeddings_list_*.json
+"""
+import argparse
+import asyncio
+import time
+from app.services.retrievers import LocalVectorRetriever, LOCAL_INDEX_DIR
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Build the local knowledge-base vector index")
+    parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--from-dumps", action="store_true", help="build from the notebook embedding dumps")
+    mode.add_argument("--refresh", action="store_true", help="only append chunks newer than the last build")
+    args = parser.parse_args()
+
+    retriever = LocalVectorRetriever(index_dir=args.index_dir)
+    started = time.perf_counter()
+    if args.from_dumps:
+        written = retriever.build_from_dumps()
+    elif args.refresh:
+        written = await retriever.refresh(wait=True)
+    else:
+        written = await retriever.build_from_mongo()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Wrote {written} chunks in {elapsed:.2f}s; index at {args.index_dir} "
+        f"holds {retriever.meta.get('count', 0)} chunks ({retriever.meta.get('source')})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
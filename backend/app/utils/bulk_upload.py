@@ -0,0 +1,90 @@
+import csv
+import io
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, BinaryIO
+
+from fastapi import Request
+
+# Request bodies above this size are spooled to disk instead of memory
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+def _csv_value(column: str, value: str) -> Any:
+    value = value.strip()
+    if value == "":
+        return None
+    if column == "images":
+        return [item.strip() for item in value.split(";") if item.strip()]
+    return value
+
+
+def iter_csv_rows(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield product dicts from a CSV file with a header row. Blank cells are omitted so
+    model defaults apply, and `images` may hold several URLs separated by semicolons.
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    records = csv.DictReader(text)
+    try:
+        while True:
+            try:
+                record = next(records)
+            except StopIteration:
+                return
+            except UnicodeDecodeError:
+                raise ValueError("CSV upload must be UTF-8 encoded")
+            row = {}
+            for column, value in record.items():
+                if column is None or value is None:
+                    continue  # ragged row
+                column = column.strip()
+                parsed = _csv_value(column, value)
+                if parsed is not None:
+                    row[column] = parsed
+            yield row
+    finally:
+        text.detach()
+
+
+async def spool_request_body(request: Request) -> BinaryIO:
+    """Copy a raw request body into a spooled temp file without holding it all in memory."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+@asynccontextmanager
+async def read_product_rows(request: Request) -> AsyncIterator[Iterator[Dict[str, Any]]]:
+    """
+    Accept a bulk product upload as a JSON array, a raw `text/csv` body, or a multipart
+    form with a CSV `file` field, and yield an iterator of raw product rows. Use with
+    `async with`; the spooled request body is closed on exit.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        payload = await request.json()
+        if isinstance(payload, dict) and isinstance(payload.get("products"), list):
+            payload = payload["products"]
+        if not isinstance(payload, list):
+            raise ValueError("Expected a JSON array of products")
+        yield iter(payload)
+    elif content_type == "text/csv":
+        spool = await spool_request_body(request)
+        try:
+            yield iter_csv_rows(spool)
+        finally:
+            spool.close()
+    elif content_type == "multipart/form-data":
+        form = await request.form()
+        try:
+            upload = form.get("file")
+            if upload is None or not hasattr(upload, "file"):
+                raise ValueError("Multipart upload must include a CSV 'file' field")
+            yield iter_csv_rows(upload.file)
+        finally:
+            await form.close()
+    else:
+        raise ValueError("Unsupported content type; send application/json, text/csv or multipart/form-data")
@@ -0,0 +1,121 @@
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import orjson
+from cachetools import TTLCache
+from app.utils.codec import dumps
+
+
+class CacheBackend:
+    """Storage for `ReadThroughCache`. Implementations must be safe to share across requests."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU with a TTL. Each uvicorn worker has its own copy."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    # Entries are copied in and out, so callers may edit what they get back (e.g. drop fields
+    # for a response) without changing what later readers see
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._entries.get(key)
+        return dict(value) if isinstance(value, dict) else value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = dict(value) if isinstance(value, dict) else value
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend for multi-worker deployments. Requires the optional `redis` package."""
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND_URL points at Redis but the 'redis' package is not installed")
+        self._client = redis.from_url(url)
+        self._ttl = int(ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._client.set(key, dumps(value), ex=self._ttl)
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            await self._client.delete(*keys)
+
+
+def make_backend(maxsize: int, ttl: float) -> CacheBackend:
+    """Pick the backend from CACHE_BACKEND_URL (redis://...); default is in-process memory."""
+    url = os.getenv("CACHE_BACKEND_URL")
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisCacheBackend(url, ttl)
+    return MemoryCacheBackend(maxsize, ttl)
+
+
+class ReadThroughCache:
+    """
+    Namespaced read-through cache with hit/miss counters.
+
+    Misses are not cached, so a profile created after a failed lookup is visible immediately.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 1024, ttl: float = 300, backend: Optional[CacheBackend] = None):
+        self.namespace = namespace
+        self.backend = backend or make_backend(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        aliases: Optional[Callable[[Any], Iterable[str]]] = None
+    ) -> Optional[Any]:
+        """
+        Return the cached value for `key`, or call `loader` and store its result under `key`
+        and every key returned by `aliases(value)`.
+        """
+        value = await self.backend.get(self._key(key))
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            for alias in {key, *(aliases(value) if aliases else ())}:
+                await self.backend.set(self._key(alias), value)
+        return value
+
+    async def invalidate(self, *keys: Optional[str]) -> None:
+        await self.backend.delete(self._key(key) for key in keys if key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
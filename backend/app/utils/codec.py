@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+# Fields that older documents imported with mongoimport may still hold as {"$date": ...}
+LEGACY_DATE_FIELDS = ("created_at", "updated_at")
+
+
+def _legacy_date(value: Dict[str, Any]) -> Any:
+    """Decode an extended-JSON `{"$date": ...}` value into a datetime."""
+    raw = value["$date"]
+    if isinstance(raw, dict):
+        raw = raw.get("$numberLong")
+    if isinstance(raw, str) and not raw.lstrip("-").isdigit():
+        return datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    return datetime.utcfromtimestamp(int(raw) / 1000)
+
+
+def encode_document(
+    doc: Dict[str, Any],
+    id_field: str = "id",
+    drop: FrozenSet[str] = frozenset()
+) -> Dict[str, Any]:
+    """
+    Shallow-copy a Mongo document into its API shape in a single pass.
+
+    `_id` is emitted as a string under `id_field`, other top-level ObjectId values (reference
+    fields such as a product's `artisan_user_id`) become strings, keys in `drop` are removed
+    and legacy `$date` values become datetimes. Datetimes are left for orjson.
+
+    ObjectIds nested inside lists or sub-documents are not converted. Only `dumps` /
+    `DefaultResponse` encode those; FastAPI's `jsonable_encoder`, which handles plain dicts
+    returned from a route, does not, so routes returning such documents must return
+    `DefaultResponse(...)` directly.
+    """
+    out = dict(doc)
+    _id = out.pop("_id", None)
+    if _id is not None:
+        out[id_field] = str(_id)
+    for key in drop:
+        out.pop(key, None)
+    for key, value in out.items():
+        if type(value) is ObjectId:
+            out[key] = str(value)
+    for key in LEGACY_DATE_FIELDS:
+        value = out.get(key)
+        if type(value) is dict and "$date" in value:
+            out[key] = _legacy_date(value)
+    return out
+
+
+def encode_documents(docs: Iterable[Dict[str, Any]], **kwargs: Any) -> list:
+    return [encode_document(doc, **kwargs) for doc in docs]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson encoding shared by API responses and streamed exports."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class DefaultResponse(ORJSONResponse):
+    """Default response class for every router: orjson with BSON-aware fallbacks."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
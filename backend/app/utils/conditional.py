@@ -0,0 +1,112 @@
+import hashlib
+import inspect
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import Request, Response
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.utils.codec import DefaultResponse
+
+# Clients may reuse a stored copy but must revalidate it first
+CACHE_CONTROL = "private, no-cache"
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if isinstance(value, ObjectId):
+        value = value.generation_time
+    elif isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    # Mongo hands back naive UTC datetimes
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return value.replace(microsecond=0)
+
+
+async def collection_version(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    time_field: str = "updated_at"
+) -> Tuple[Optional[Any], int]:
+    """
+    Cheap change marker for the documents matching `query`: the newest `time_field` value
+    (one index-ordered document) and the match count. Any insert, delete or timestamped
+    update changes at least one of them.
+    """
+    newest = await collection.find_one(query, {time_field: 1}, sort=[(time_field, -1)])
+    if query:
+        count = await collection.count_documents(query)
+    else:
+        count = await collection.estimated_document_count()
+    return (newest or {}).get(time_field), count
+
+
+def make_validators(request: Request, *version: Any, last_modified: Any = None) -> Validators:
+    """
+    Weak ETag over the request URL and `version` parts, plus an optional Last-Modified.
+
+    Only pass `last_modified` for a single document. A list can shrink (a delete) without
+    its newest timestamp moving, so list routes rely on the ETag, which includes the count.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(request.url.path).encode("utf-8"))
+    digest.update(str(sorted(request.query_params.multi_items())).encode("utf-8"))
+    for part in version:
+        digest.update(b"\x00" + str(part).encode("utf-8"))
+    return Validators(f'W/"{digest.hexdigest()}"', _as_utc(last_modified))
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """RFC 9110 evaluation: If-None-Match wins; If-Modified-Since is only used without it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        opaque = validators.etag[2:]  # weak comparison ignores the W/ prefix
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators.last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return validators.last_modified <= since
+    return False
+
+
+def _validator_headers(validators: Validators) -> Dict[str, str]:
+    headers = {"ETag": validators.etag, "Cache-Control": CACHE_CONTROL}
+    if validators.last_modified:
+        headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return headers
+
+
+async def conditional_response(
+    request: Request,
+    validators: Validators,
+    build: Callable[[], Any]
+) -> Response:
+    """
+    Answer 304 without calling `build` when the client's copy is current, otherwise build
+    (awaiting it if needed), serialize and send the content with fresh validators.
+    """
+    headers = _validator_headers(validators)
+    if is_not_modified(request, validators):
+        return Response(status_code=304, headers=headers)
+    content = build()
+    if inspect.isawaitable(content):
+        content = await content
+    return DefaultResponse(content, headers=headers)
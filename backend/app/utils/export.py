@@ -0,0 +1,84 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCursor
+from app.utils.codec import dumps
+
+EXPORT_BATCH_SIZE = 500
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return dumps(value).decode("utf-8")
+    return value
+
+
+async def ndjson_stream(
+    cursor: AsyncIOMotorCursor,
+    serializer: Callable[[Dict[str, Any]], Dict[str, Any]],
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """Yield one JSON document per line, flushing a chunk every `batch_size` documents."""
+    cursor.batch_size(batch_size)
+    lines: List[bytes] = []
+    async for doc in cursor:
+        lines.append(dumps(serializer(doc)))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def csv_stream(
+    cursor: AsyncIOMotorCursor,
+    serializer: Callable[[Dict[str, Any]], Dict[str, Any]],
+    columns: Optional[List[str]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Yield CSV rows in chunks of `batch_size`. Without explicit `columns` the header is taken
+    from the first document; keys that only appear later are dropped.
+    """
+    cursor.batch_size(batch_size)
+    buffer = io.StringIO()
+    writer = None
+    rows = 0
+    async for doc in cursor:
+        row = serializer(doc)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=columns or list(row.keys()), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow({key: _csv_cell(value) for key, value in row.items()})
+        rows += 1
+        if rows % batch_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if writer is None and columns:
+        csv.DictWriter(buffer, fieldnames=columns).writeheader()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_stream(
+    cursor: AsyncIOMotorCursor,
+    serializer: Callable[[Dict[str, Any]], Dict[str, Any]],
+    fmt: str,
+    columns: Optional[List[str]] = None
+) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        return csv_stream(cursor, serializer, columns)
+    return ndjson_stream(cursor, serializer)
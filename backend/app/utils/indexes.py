@@ -0,0 +1,66 @@
+from pymongo import ASCENDING, DESCENDING, TEXT
+from app.db import db
+from app.services.embedding_cache import COLLECTION_NAME as EMBEDDING_CACHE_COLLECTION, EMBEDDING_CACHE_TTL
+from app.services.generation_cache import COLLECTION_NAME as GENERATION_CACHE_COLLECTION, GENERATION_CACHE_TTL
+from app.services.job_queue import COLLECTION_NAME as JOBS_COLLECTION
+
+
+async def ensure_indexes() -> None:
+    """Create the indexes the services rely on. Safe to run on every startup."""
+    artisans = db["artisans"]
+    await artisans.create_index([("skills_norm", ASCENDING)], name="skills_norm")
+    await artisans.create_index([("location_norm", ASCENDING)], name="location_norm")
+    await artisans.create_index([("user_id", ASCENDING)], name="user_id")
+    await artisans.create_index([("email", ASCENDING)], name="email")
+    await artisans.create_index([("updated_at", DESCENDING)], name="updated_at")
+
+    products = db["products"]
+    await products.create_index(
+        [("artisan_user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="artisan_user_id_created_at"
+    )
+    await products.create_index(
+        [("artisan_email", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="artisan_email_created_at"
+    )
+    await products.create_index(
+        [("name", TEXT), ("description", TEXT), ("category", TEXT)],
+        weights={"name": 10, "category": 5, "description": 1},
+        name="product_text"
+    )
+
+    # Lexical side of hybrid assistant retrieval
+    await db["knowledge_base"].create_index(
+        [("text", TEXT), ("chunk", TEXT)],
+        name="knowledge_base_text"
+    )
+    # Ingestion upserts on the chunk's content hash; older chunks loaded without one are exempt
+    await db["knowledge_base"].create_index(
+        [("content_hash", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"content_hash": {"$exists": True}},
+        name="content_hash"
+    )
+
+    # Cached query embeddings and generations expire on their own
+    await db[EMBEDDING_CACHE_COLLECTION].create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=EMBEDDING_CACHE_TTL,
+        name="created_at_ttl"
+    )
+    await db[GENERATION_CACHE_COLLECTION].create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=GENERATION_CACHE_TTL,
+        name="created_at_ttl"
+    )
+
+    # Background jobs: workers claim queued ones oldest first, the reaper scans heartbeats and
+    # purges by expires_at (not a TTL index, which would leave the jobs' GridFS files behind)
+    jobs = db[JOBS_COLLECTION]
+    await jobs.create_index([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at")
+    await jobs.create_index([("status", ASCENDING), ("heartbeat_at", ASCENDING)], name="status_heartbeat_at")
+    try:
+        await jobs.drop_index("expires_at_ttl")
+    except Exception:
+        pass  # not there
+    await jobs.create_index([("expires_at", ASCENDING)], name="expires_at")
@@ -0,0 +1,194 @@
+"""
+Chunk raw documents (.txt, .md, .pdf), embed the chunks with the same MiniLM endpoint the
+assistant uses, and upsert them into `knowledge_base`.
+
+Chunks whose content hash is already stored are not embedded again. New chunks are embedded
+in batches (list inputs to HF) with a bounded number of requests in flight and retries with
+backoff on rate limits and transient errors.
+
+Run from the backend directory:
+    python -m app.utils.ingest_documents docs/scheme.pdf docs/notes.txt --chunk-size 1000 --overlap 150
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+import httpx
+from app.db import db
+from app.services.RAG_chatbot import EmbeddingAPIError, fetch_embeddings, close_http_client
+from app.services.answer_cache import bump_kb_version
+from app.utils.indexes import ensure_indexes
+from app.utils.push_kb_to_db import COLLECTION_NAME, backfill_content_hashes, chunk_operation, content_hash
+
+CHUNK_SIZE = 1000  # characters; MiniLM truncates at 256 word pieces, roughly 1,000 characters
+CHUNK_OVERLAP = 150
+EMBED_BATCH_SIZE = 32
+EMBED_CONCURRENCY = 4
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HASH_LOOKUP_BATCH = 500
+
+
+def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Split `text` into pieces of at most `size` characters, consecutive pieces sharing about
+    `overlap` characters. Cuts fall on whitespace where possible so words are not split.
+    """
+    if size <= 0:
+        raise ValueError("chunk size must be positive")
+    if not 0 <= overlap < size:
+        raise ValueError("overlap must be at least 0 and smaller than the chunk size")
+
+    text = " ".join(text.split())
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + 1, end)
+            if cut > start + overlap:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = end - overlap
+        if overlap:
+            # Begin the overlap on a word boundary too
+            space = text.find(" ", next_start, end)
+            if space != -1:
+                next_start = space + 1
+        start = max(next_start, start + 1)
+    return chunks
+
+
+def read_document(path: str) -> str:
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise RuntimeError("Reading PDFs requires the optional 'pypdf' package")
+        return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class EmbeddingBatcher:
+    """Embeds text batches with at most `concurrency` HF calls in flight, retrying transient failures."""
+
+    def __init__(self, batch_size: int = EMBED_BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY):
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.calls = 0
+        self.retries = 0
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(MAX_RETRIES + 1):
+            async with self._semaphore:
+                self.calls += 1
+                try:
+                    return await fetch_embeddings(texts)
+                except (httpx.TransportError, EmbeddingAPIError) as e:
+                    # The HF router answers 429 when rate limited and 503 while the model loads
+                    transient = isinstance(e, httpx.TransportError) or e.status_code in RETRY_STATUSES
+                    if not transient or attempt == MAX_RETRIES:
+                        raise
+            self.retries += 1
+            await asyncio.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random() / 2))
+        raise RuntimeError("unreachable")
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch(batch) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+
+async def existing_hashes(collection, hashes: List[str]) -> set:
+    found = set()
+    for i in range(0, len(hashes), HASH_LOOKUP_BATCH):
+        cursor = collection.find({"content_hash": {"$in": hashes[i:i + HASH_LOOKUP_BATCH]}}, {"content_hash": 1})
+        async for doc in cursor:
+            found.add(doc["content_hash"])
+    return found
+
+
+async def ingest_documents(
+    paths: List[str],
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+    batch_size: int = EMBED_BATCH_SIZE,
+    concurrency: int = EMBED_CONCURRENCY
+) -> Dict[str, Any]:
+    await ensure_indexes()
+    collection = db[COLLECTION_NAME]
+    # Chunks loaded before content hashes existed would not be found by existing_hashes
+    backfill = await backfill_content_hashes(collection)
+    batcher = EmbeddingBatcher(batch_size=batch_size, concurrency=concurrency)
+    started = time.perf_counter()
+    summary = {"documents": 0, "chunks": 0, "already_present": 0, "embedded": 0, "inserted": 0}
+
+    for path in paths:
+        source = os.path.basename(path)
+        chunks = chunk_text(read_document(path), size=chunk_size, overlap=overlap)
+        unique = list(dict.fromkeys(chunks))
+        hashes = [content_hash(chunk) for chunk in unique]
+        present = await existing_hashes(collection, hashes)
+        new_chunks = [chunk for chunk, digest in zip(unique, hashes) if digest not in present]
+
+        inserted = 0
+        if new_chunks:
+            vectors = await batcher.embed(new_chunks)
+            ops = [
+                chunk_operation({"id": i, "text": chunk, "embedding": vector}, source)
+                for i, (chunk, vector) in enumerate(zip(new_chunks, vectors))
+            ]
+            result = await collection.bulk_write(ops, ordered=False)
+            inserted = result.upserted_count
+
+        summary["documents"] += 1
+        summary["chunks"] += len(chunks)
+        summary["already_present"] += len(chunks) - len(new_chunks)
+        summary["embedded"] += len(new_chunks)
+        summary["inserted"] += inserted
+        print(f"{source}: {len(chunks)} chunks, {len(chunks) - len(new_chunks)} already present, {inserted} inserted")
+
+    if summary["inserted"] or backfill["duplicates_removed"]:
+        await bump_kb_version()
+    summary["embedding_calls"] = batcher.calls
+    summary["retries"] = batcher.retries
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Chunk, embed and store knowledge-base documents")
+    parser.add_argument("files", nargs="+", help=".txt, .md or .pdf documents")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="characters per chunk")
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP, help="characters shared by neighbouring chunks")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="chunks per embedding call")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY, help="embedding calls in flight")
+    args = parser.parse_args()
+
+    try:
+        summary = await ingest_documents(
+            args.files,
+            chunk_size=args.chunk_size,
+            overlap=args.overlap,
+            batch_size=max(1, args.batch_size),
+            concurrency=max(1, args.concurrency),
+        )
+    finally:
+        await close_http_client()
+    print(
+        f"{summary['documents']} documents, {summary['chunks']} chunks: {summary['inserted']} inserted, "
+        f"{summary['already_present']} already present; {summary['embedding_calls']} embedding calls "
+        f"for {summary['embedded']} chunks ({summary['retries']} retries) in {summary['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+SORT_FIELDS = ("_id", "created_at")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(doc: Dict[str, Any], sort_field: str = "_id") -> str:
+    """Build an opaque cursor pointing just past `doc` in the (sort_field, _id) order."""
+    payload = {"f": sort_field, "v": _encode_value(doc.get(sort_field)), "id": str(doc["_id"])}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str = "_id") -> Dict[str, Any]:
+    """Decode a cursor produced by `encode_cursor` into a keyset filter."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = ObjectId(payload["id"])
+        value = _decode_value(payload.get("v"))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if payload.get("f") != sort_field:
+        raise ValueError("Cursor does not match the requested sort order")
+
+    if sort_field == "_id":
+        return {"_id": {"$lt": last_id}}
+
+    # Newest first: strictly older values, then ties broken by _id.
+    # Documents without the field sort last and are reached once the dated ones run out.
+    if value is None:
+        return {sort_field: None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {sort_field: {"$lt": value}},
+        {sort_field: value, "_id": {"$lt": last_id}},
+        {sort_field: None},
+    ]}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Turn a comma-separated `fields` query parameter into a list of field names."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    return names or None
+
+
+def build_projection(
+    fields: Optional[List[str]],
+    sort_field: str = "_id",
+    exclude: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, int]]:
+    """Inclusion projection for the requested fields (always keeping the keyset keys),
+    or an exclusion projection for `exclude` when no fields were requested."""
+    if fields:
+        projection = {name: 1 for name in fields if name not in (exclude or [])}
+        projection["_id"] = 1
+        projection[sort_field] = 1
+        return projection
+    if exclude:
+        return {name: 0 for name in exclude}
+    return None
+
+
+async def paginate(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    *,
+    limit: int = DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    sort_field: str = "_id",
+    projection: Optional[Dict[str, int]] = None,
+    serializer: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Keyset (cursor) pagination over a Mongo collection, newest first.
+
+    Fetches `limit + 1` documents to know whether another page exists without a count,
+    and returns `{"results", "count", "next_cursor"}`; `next_cursor` is None on the last page.
+    """
+    if sort_field not in SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort_field}")
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    if cursor:
+        keyset = decode_cursor(cursor, sort_field)
+        query = {"$and": [query, keyset]} if query else keyset
+
+    sort = [("_id", -1)] if sort_field == "_id" else [(sort_field, -1), ("_id", -1)]
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+
+    results = [serializer(doc) for doc in docs] if serializer else docs
+    return {"results": results, "count": len(results), "next_cursor": next_cursor}
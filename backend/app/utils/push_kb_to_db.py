@@ -1,67 +1,267 @@
+"""
+Load knowledge-base chunks (text + embedding) into the `knowledge_base` collection.
+
+Each input file is a JSON array of {"id", "text", "embedding"} objects, like the notebook
+dumps. Files are parsed incrementally and written in bounded batches. Chunks are upserted on a
+hash of their text, so re-running the script, or loading overlapping files, inserts nothing twice.
+Chunks stored before hashes existed are backfilled (and de-duplicated) first, so they are
+recognised too.
+
+Run from the backend directory:
+    python -m app.utils.push_kb_to_db                         # notebooks/output_embeddings_list_*.json
+    python -m app.utils.push_kb_to_db path/to/a.json path/to/b.json --batch-size 200 --concurrency 2
+    python -m app.utils.push_kb_to_db --backfill-only             # only hash/de-duplicate existing chunks
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
 import json
-from pymongo import MongoClient
 import os
-from dotenv import load_dotenv
-load_dotenv()
-global MONGO_URI, DB_NAME, COLLECTION_NAME, JSON_FILE_PATH
-MONGO_URI = os.getenv("MONGO_URL")
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.db import db
+from app.services.answer_cache import bump_kb_version
+from app.utils.indexes import ensure_indexes
+
 COLLECTION_NAME = "knowledge_base"
-DB_NAME = "hidden_gems"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_GLOB = os.path.join(BACKEND_DIR, "notebooks", "output_embeddings_list_*.json")
+BATCH_SIZE = 500
+READ_CHUNK_SIZE = 1 << 16
+DUPLICATE_KEY = 11000
 
-def load_json_to_mongo():
-    # Connect to MongoDB
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
-    collection = db[COLLECTION_NAME]
 
-    # Load JSON file
-    with open(JSON_FILE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def content_hash(text: str) -> str:
+    """Identity of a chunk: sha256 of its whitespace-collapsed text."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
 
-    # Ensure list of documents
-    if isinstance(data, dict):
-        data = [data]
 
-    # Insert into MongoDB
-    result = collection.insert_many(data)
-    print(f"Inserted {len(result.inserted_ids)} documents into '{DB_NAME}.{COLLECTION_NAME}'")
-    
-if __name__ == "__main__":
-    JSON_FILE_PATH = "../../notebooks/output_embeddings_list.json"  
-    load_dotenv()
-    
-    for i in range(1, 7):
-        JSON_FILE_PATH = os.path.join("../../notebooks", f"output_embeddings_list_{i}.json")
-        if not os.path.exists(JSON_FILE_PATH):
-            print(f"File not found: {JSON_FILE_PATH}")
+def iter_json_array(fileobj: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array (or a single top-level object) while reading
+    the file `chunk_size` characters at a time, so memory stays at about one element.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    started, eof = False, False
+
+    while True:
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                if started:
+                    raise ValueError("Unexpected end of file: JSON array is not closed")
+                return
+            data = fileobj.read(chunk_size)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
+            continue
+
+        ch = buf[pos]
+        if started and ch == ",":
+            pos += 1
+            continue
+        if started and ch == "]":
+            return
+        if not started and ch == "[":
+            started = True
+            pos += 1
+            continue
+        if not started and ch != "{":
+            raise ValueError(f"Expected a JSON array or object, found {ch!r}")
+
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Element continues past the buffer: read more and retry
+            data = fileobj.read(chunk_size)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
             continue
-        print(f"Inserting from {JSON_FILE_PATH} ...")
-        load_json_to_mongo()
-    # import json
-    # import os
+        yield obj
+        pos = end
+        if not started:
+            return  # a single object file
+
+
+def chunk_operation(doc: Dict[str, Any], source: str) -> Optional[UpdateOne]:
+    text = doc.get("text") or doc.get("chunk") or ""
+    embedding = doc.get("embedding")
+    if not text.strip() or not embedding:
+        return None
+    digest = content_hash(text)
+    return UpdateOne(
+        {"content_hash": digest},
+        # $setOnInsert: an existing chunk is left untouched, so a rerun writes nothing
+        {"$setOnInsert": {
+            "content_hash": digest,
+            "text": text,
+            "embedding": embedding,
+            "source": source,
+            "source_id": doc.get("id"),
+            "created_at": datetime.utcnow(),
+        }},
+        upsert=True
+    )
+
+
+async def backfill_content_hashes(collection, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Give every chunk loaded before content hashes existed its `content_hash`, oldest first,
+    and delete the ones whose text is already stored: setting a hash that is taken fails on
+    the unique index, which marks exactly the duplicates. Safe to run repeatedly; it only
+    touches documents without a hash. Must run before the upsert path, which would otherwise
+    insert all of those chunks again.
+    """
+    result = {"hashed": 0, "duplicates_removed": 0}
+    cursor = collection.find(
+        {"content_hash": {"$exists": False}}, {"text": 1, "chunk": 1}
+    ).sort("_id", 1)
+    batch: List[UpdateOne] = []
+    ids: List[Any] = []
 
-    # # Directory where your files are located
-    # NOTEBOOKS_DIR = "../../notebooks"
+    async def flush():
+        failed = []
+        try:
+            # Unordered: a duplicate must not stop the rest of the batch from being hashed
+            write = await collection.bulk_write(batch, ordered=False)
+            result["hashed"] += write.modified_count
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            failed = [ids[error["index"]] for error in errors]
+            result["hashed"] += e.details.get("nModified", 0)
+        if failed:
+            deleted = await collection.delete_many({"_id": {"$in": failed}})
+            result["duplicates_removed"] += deleted.deleted_count
+        batch.clear()
+        ids.clear()
 
-    # # Process files named output_embeddings (1).json to output_embeddings (6).json
-    # for i in range(1, 7):
-    #     input_filename = f"output_embeddings ({i}).json"
-    #     output_filename = f"output_embeddings_list_{i}.json"
-    #     input_path = os.path.join(NOTEBOOKS_DIR, input_filename)
-    #     output_path = os.path.join(NOTEBOOKS_DIR, output_filename)
+    async for doc in cursor:
+        text = doc.get("text") or doc.get("chunk") or ""
+        if not text.strip():
+            continue  # nothing to identify it by; the partial index leaves it alone
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"content_hash": content_hash(text)}}))
+        ids.append(doc["_id"])
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return result
 
-    #     if not os.path.exists(input_path):
-    #         print(f"File not found: {input_path}")
-    #         continue
 
-    #     with open(input_path, "r", encoding="utf-8") as f:
-    #         data = json.load(f)
+class IngestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.read = 0
+        self.skipped = 0
+        self.inserted = 0
 
-    #     # If data is a dict, convert to list of values
-    #     if isinstance(data, dict):
-    #         data = list(data.values())
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.read / elapsed if elapsed else 0.0
+        return (
+            f"{self.read} read, {self.inserted} new, {self.read - self.inserted - self.skipped} already present, "
+            f"{self.skipped} skipped in {elapsed:.1f}s ({rate:.0f} chunks/s)"
+        )
 
-    #     with open(output_path, "w", encoding="utf-8") as f:
-    #         json.dump(data, f, indent=2, ensure_ascii=False)
 
-    #     print(f"Converted {input_filename} to {output_filename}")
\ No newline at end of file
+async def ingest_file(path: str, collection, batch_size: int, totals: IngestStats) -> IngestStats:
+    stats = IngestStats()
+    source = os.path.basename(path)
+    ops: List[UpdateOne] = []
+
+    async def flush():
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            upserted = result.upserted_count
+        except BulkWriteError as e:
+            # Two files upserting the same new chunk at once: one wins, the other hits the
+            # unique index. That is the idempotency we want; anything else is a real failure.
+            if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+            upserted = e.details.get("nUpserted", 0)
+        stats.inserted += upserted
+        totals.inserted += upserted
+        ops.clear()
+        print(f"  {source}: {stats.line()}")
+
+    with open(path, "r", encoding="utf-8") as f:
+        for doc in iter_json_array(f):
+            stats.read += 1
+            totals.read += 1
+            op = chunk_operation(doc, source) if isinstance(doc, dict) else None
+            if op is None:
+                stats.skipped += 1
+                totals.skipped += 1
+                continue
+            ops.append(op)
+            if len(ops) >= batch_size:
+                await flush()
+    if ops:
+        await flush()
+    print(f"Done {source}: {stats.line()}")
+    return stats
+
+
+async def ingest(paths: List[str], batch_size: int = BATCH_SIZE, concurrency: int = 3) -> IngestStats:
+    """Ingest `paths`, at most `concurrency` files at a time. Returns the combined stats."""
+    await ensure_indexes()
+    collection = db[COLLECTION_NAME]
+    backfill = await backfill_content_hashes(collection, batch_size)
+    if backfill["hashed"] or backfill["duplicates_removed"]:
+        print(f"Backfilled {backfill['hashed']} content hashes, removed {backfill['duplicates_removed']} duplicate chunks")
+    totals = IngestStats()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(path: str):
+        async with semaphore:
+            print(f"Ingesting {path} ...")
+            return await ingest_file(path, collection, batch_size, totals)
+
+    await asyncio.gather(*(run(path) for path in paths))
+    if totals.inserted or backfill["duplicates_removed"]:
+        await bump_kb_version()
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load knowledge-base chunks into MongoDB")
+    parser.add_argument("files", nargs="*", help=f"JSON files to load (default: {DEFAULT_GLOB})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=3, help="files processed at the same time")
+    parser.add_argument("--backfill-only", action="store_true", help="hash and de-duplicate existing chunks, load nothing")
+    args = parser.parse_args()
+
+    if args.backfill_only:
+        await ensure_indexes()
+        backfill = await backfill_content_hashes(db[COLLECTION_NAME], args.batch_size)
+        if backfill["duplicates_removed"]:
+            await bump_kb_version()
+        print(f"Backfilled {backfill['hashed']} content hashes, removed {backfill['duplicates_removed']} duplicate chunks")
+        return
+
+    paths = args.files or sorted(glob.glob(DEFAULT_GLOB))
+    missing = [path for path in paths if not os.path.exists(path)]
+    for path in missing:
+        print(f"File not found: {path}")
+    paths = [path for path in paths if path not in missing]
+    if not paths:
+        print("Nothing to ingest")
+        return
+
+    totals = await ingest(paths, batch_size=args.batch_size, concurrency=max(1, args.concurrency))
+    print(f"Total: {totals.line()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
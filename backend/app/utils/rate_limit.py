@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second refill up to `capacity`. `acquire(n)` waits
+    until n tokens are available, so callers spread out to the configured rate instead of
+    bursting and being throttled upstream. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        # A request larger than the bucket could never be served; let it through on a full bucket
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    delay = (tokens - self._tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (e.g. the provider's Retry-After) and drain the bucket."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(max(time.monotonic(), self._updated))
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "available": round(self._tokens, 2),
+            "waited_seconds": round(self.waited, 2),
+        }
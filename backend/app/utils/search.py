@@ -0,0 +1,68 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+from bson.regex import Regex
+
+_SEPARATOR_CATEGORIES = ("P", "S", "Z", "C")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """
+    Case-fold, drop Latin accents and collapse punctuation/whitespace to single spaces.
+    Letters and combining marks of other scripts (e.g. Devanagari vowel signs) are kept.
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(value))
+    chars = []
+    for ch in decomposed:
+        category = unicodedata.category(ch)
+        if category.startswith(_SEPARATOR_CATEGORIES):
+            chars.append(" ")
+        elif unicodedata.combining(ch) and chars and chars[-1].isascii():
+            continue  # accent on a Latin letter
+        else:
+            chars.append(ch)
+    text = unicodedata.normalize("NFKC", "".join(chars)).casefold()
+    return " ".join(text.split())
+
+
+def search_tokens(values: Iterable[Optional[str]]) -> List[str]:
+    """
+    Index tokens for a list of phrases: every normalized phrase plus each of its words,
+    de-duplicated in first-seen order. Stored as an array so Mongo builds a multikey index.
+    """
+    tokens: List[str] = []
+    seen = set()
+    for value in values:
+        phrase = normalize_text(value)
+        if not phrase:
+            continue
+        for token in [phrase] + phrase.split(" "):
+            if token not in seen:
+                seen.add(token)
+                tokens.append(token)
+    return tokens
+
+
+def artisan_search_fields(skills: Optional[List[str]], location: Optional[str]) -> Dict[str, List[str]]:
+    """Denormalized `skills_norm`/`location_norm` fields to store alongside an artisan document."""
+    return {
+        "skills_norm": search_tokens(skills or []),
+        "location_norm": search_tokens([location]),
+    }
+
+
+def prefix_query(field: str, term: str) -> Dict[str, Any]:
+    """
+    Index-friendly filter matching documents where every word of `term` is a prefix of
+    some token in `field`. The patterns are anchored and case-sensitive against already
+    lower-cased tokens, so Mongo turns them into tight index bounds instead of a COLLSCAN.
+    """
+    words = normalize_text(term).split()
+    if not words:
+        raise ValueError(f"Search term for {field} must contain letters or digits")
+    patterns = [Regex("^" + re.escape(word)) for word in words]
+    if len(patterns) == 1:
+        return {field: patterns[0]}
+    return {"$and": [{field: pattern} for pattern in patterns]}
@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+from app.utils.codec import dumps
+
+# Every group, by name, for /metrics/singleflight
+groups: Dict[str, "SingleFlight"] = {}
+
+
+def make_key(*parts: Any) -> str:
+    """Stable key for already-normalized call arguments."""
+    return hashlib.sha256(dumps(parts)).hexdigest()
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one: the first caller for a key starts the work,
+    callers arriving while it is in flight await the same task and get the same result (or
+    exception). Nothing is kept once the call finishes; this is coalescing, not caching.
+
+    The shared task is shielded, so a caller that disconnects does not cancel the work the
+    others are waiting on.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.deduplicated = 0
+        groups[name] = self
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            leader = True
+        else:
+            self.deduplicated += 1
+            leader = False
+        result = await asyncio.shield(task)
+        # Followers get their own top-level copy so one request cannot mutate another's response
+        return dict(result) if not leader and isinstance(result, dict) else result
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "upstream_calls": self.calls - self.deduplicated,
+            "in_flight": len(self._in_flight),
+            "dedup_ratio": round(self.deduplicated / self.calls, 4) if self.calls else 0.0,
+        }
@@ -0,0 +1,80 @@
+"""
+Microbenchmark: per-document serialization cost of the old per-module helpers
+vs. the shared single-pass codec, on a 10k-document artisan listing.
+
+Run from the backend directory:
+    python -m benchmarks.bench_codec
+"""
+import json
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.codec import dumps, encode_document
+
+N_DOCS = 10_000
+REPEAT = 5
+
+
+def legacy_serialize_artisan(artisan: dict) -> dict:
+    # Copy of the pre-codec helper from app/services/artisan_service.py
+    artisan = dict(artisan)  # copy
+    artisan["id"] = str(artisan["_id"])
+    artisan.pop("_id", None)
+    if "password_hash" in artisan:
+        artisan.pop("password_hash")
+    for date_field in ["created_at", "updated_at"]:
+        if date_field in artisan and artisan[date_field]:
+            if hasattr(artisan[date_field], "isoformat"):
+                artisan[date_field] = artisan[date_field].isoformat()
+            elif isinstance(artisan[date_field], dict) and "$date" in artisan[date_field]:
+                from datetime import datetime
+                ts = int(artisan[date_field]["$date"]["$numberLong"]) / 1000
+                artisan[date_field] = datetime.utcfromtimestamp(ts).isoformat()
+    return artisan
+
+
+def make_docs(n: int) -> list:
+    now = datetime.utcnow()
+    docs = []
+    for i in range(n):
+        docs.append({
+            "_id": ObjectId(),
+            "user_id": f"user-{i}",
+            "name": f"Artisan {i}",
+            "email": f"artisan{i}@example.com",
+            "password_hash": "$2b$12$" + "x" * 53,
+            "location": "Jaipur, Rajasthan",
+            "bio": "Block printer working with natural dyes.",
+            "skills": ["Block Printing", "Natural Dyeing"],
+            "created_at": now,
+            "updated_at": {"$date": {"$numberLong": "1726000000000"}} if i % 10 == 0 else now,
+        })
+    return docs
+
+
+def bench(label: str, fn) -> float:
+    best = min(timeit.repeat(fn, number=1, repeat=REPEAT))
+    print(f"{label:<42} {best * 1000:8.2f} ms total  {best / N_DOCS * 1e6:6.2f} us/doc")
+    return best
+
+
+def main():
+    docs = make_docs(N_DOCS)
+    drop = frozenset({"password_hash"})
+    print(f"{N_DOCS} documents, best of {REPEAT}")
+    old = bench("legacy serialize_artisan", lambda: [legacy_serialize_artisan(d) for d in docs])
+    new = bench("codec.encode_document", lambda: [encode_document(d, drop=drop) for d in docs])
+    # Old response path: JSONResponse runs jsonable_encoder then json.dumps
+    old_full = bench(
+        "legacy + jsonable_encoder + json.dumps",
+        lambda: json.dumps(jsonable_encoder([legacy_serialize_artisan(d) for d in docs]))
+    )
+    new_full = bench("codec + DefaultResponse (orjson)", lambda: dumps([encode_document(d, drop=drop) for d in docs]))
+    print(f"serialize speedup: {old / new:.2f}x, serialize+encode speedup: {old_full / new_full:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Latency of back-to-back LLM calls: a new Groq client per call (the old ProductDescriptionGenerator
+behaviour) vs. the shared client from app.utils.ai.
+
+By default the run needs no network or keys. It starts a local HTTPS server that answers
+chat-completions requests with a fixed body after SERVER_LATENCY seconds, so the difference
+between the two variants is the TCP + TLS setup (and client construction) the shared pool skips.
+Against a real provider the gap grows with the round-trip time to the API edge.
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_clients
+    python -m benchmarks.bench_llm_clients --live     # real Groq API, needs GROQ_API_KEY
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import ssl
+import statistics
+import tempfile
+import time
+
+import httpx
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+CALLS = 30
+SERVER_LATENCY = 0.005
+PROMPT = [{"role": "user", "content": "Say ok."}]
+COMPLETION = (
+    b'{"id":"bench","object":"chat.completion","created":0,"model":"bench",'
+    b'"choices":[{"index":0,"message":{"role":"assistant","content":"ok"},"finish_reason":"stop"}],'
+    b'"usage":{"prompt_tokens":3,"completion_tokens":1,"total_tokens":4}}'
+)
+
+
+def self_signed_context() -> ssl.SSLContext:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .sign(key, hashes.SHA256())
+    )
+    directory = tempfile.mkdtemp()
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # Minimal HTTP/1.1 keep-alive responder: every request gets the same completion
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            await asyncio.sleep(SERVER_LATENCY)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(COMPLETION)).encode() + b"\r\n\r\n" + COMPLETION
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def timed_calls(make_call, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await make_call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies):
+    print(
+        f"{label:<22} n={len(latencies)} first={latencies[0]:7.1f}ms "
+        f"p50={statistics.median(latencies):7.1f}ms mean(after first)="
+        f"{statistics.mean(latencies[1:]):7.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true", help="call the real Groq API")
+    parser.add_argument("--calls", type=int, default=CALLS)
+    args = parser.parse_args()
+
+    from groq import AsyncGroq, DefaultAsyncHttpxClient
+    from app.utils import ai
+
+    if args.live:
+        base_url, verify, model, api_key = None, True, ai.GROQ_MODEL, os.environ["GROQ_API_KEY"]
+        server = None
+    else:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=self_signed_context())
+        port = server.sockets[0].getsockname()[1]
+        base_url, verify, model, api_key = f"https://127.0.0.1:{port}", False, "bench", "bench"
+        os.environ["GROQ_API_KEY"] = api_key
+
+    async def per_call_client():
+        # What every request used to do: build a client, make one call, drop it
+        client = AsyncGroq(
+            api_key=api_key, base_url=base_url, http_client=DefaultAsyncHttpxClient(verify=verify)
+        )
+        try:
+            await client.chat.completions.create(model=model, messages=PROMPT, max_tokens=1)
+        finally:
+            await client.close()
+
+    # The registry client, pointed at the same endpoint
+    shared = ai.get_groq_client()
+    if not args.live:
+        await shared.close()
+        ai._groq_client = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=DefaultAsyncHttpxClient(limits=ai._limits(), timeout=ai._timeout(), verify=verify),
+        )
+        shared = ai._groq_client
+
+    async def shared_client():
+        await shared.chat.completions.create(model=model, messages=PROMPT, max_tokens=1)
+
+    report("client per call", await timed_calls(per_call_client, args.calls))
+    report("shared registry client", await timed_calls(shared_client, args.calls))
+
+    await ai.close_ai_clients()
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Concurrency benchmark: latency of a cheap read route (GET /api/v1/events/) while assistant
+chats are in flight, with the old blocking RAG pipeline vs. the async one.
+
+Upstream latency (HF embedding + Gemini) is simulated so the run needs no network or keys:
+the blocking variant sleeps with time.sleep the way requests/pymongo/generate_content did,
+the async variant awaits asyncio.sleep through the real rag_answer.
+
+Run from the backend directory:
+    python -m benchmarks.bench_rag_concurrency
+"""
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import httpx
+
+from app.main import app
+from app.routers import assistant, event_finding
+from app.services import RAG_chatbot
+
+EMBED_LATENCY = 0.15
+GENERATE_LATENCY = 0.8
+CONCURRENT_CHATS = 10
+PROBE_INTERVAL = 0.05
+EVENTS = [{"_id": str(i), "Event Title": f"Event {i}"} for i in range(50)]
+
+
+async def fake_events_version():
+    return None, len(EVENTS)
+
+
+async def fake_all_events():
+    return list(EVENTS)
+
+
+def blocking_rag_answer(query: str, top_k: int = 3, budget=None):
+    time.sleep(EMBED_LATENCY)
+    time.sleep(GENERATE_LATENCY)
+    return {"query": query, "retrieved": [], "answer": "ok"}
+
+
+async def blocking_route_adapter(query: str, top_k: int = 3, budget=None):
+    # The old route called the sync pipeline directly inside `async def`
+    return blocking_rag_answer(query, top_k)
+
+
+async def fake_embedding(query: str) -> list:
+    await asyncio.sleep(EMBED_LATENCY)
+    return [0.0] * 384
+
+
+async def fake_retrieve_context(query, query_embedding, top_k, budget):
+    return {"chunks": [], "context_tokens": 0, "dropped_duplicates": 0}
+
+
+async def no_cached_answer(*args):
+    return None
+
+
+async def fake_gemini(query: str, context_texts: list) -> str:
+    await asyncio.sleep(GENERATE_LATENCY)
+    return "ok"
+
+
+async def run(label: str) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        done = asyncio.Event()
+        probe_latencies = []
+
+        async def probe():
+            # Latency is measured from when the probe was due, so time spent waiting for a
+            # blocked event loop counts against the route, as it would for a real client
+            while not done.is_set():
+                due = time.perf_counter() + PROBE_INTERVAL
+                await asyncio.sleep(PROBE_INTERVAL)
+                await client.get("/api/v1/events/")
+                probe_latencies.append(time.perf_counter() - due)
+
+        async def chat(i: int):
+            await client.post("/api/v1/assistant/chat", json={"query": f"funding question {i}"})
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(PROBE_INTERVAL / 2)
+        start = time.perf_counter()
+        await asyncio.gather(*(chat(i) for i in range(CONCURRENT_CHATS)))
+        chats_elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    ms = sorted(latency * 1000 for latency in probe_latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1] if len(ms) > 1 else ms[0]
+    print(
+        f"{label:<10} {CONCURRENT_CHATS} chats in {chats_elapsed:5.2f}s | "
+        f"events probes: n={len(ms):3d} p50={statistics.median(ms):7.1f}ms "
+        f"p95={p95:7.1f}ms max={ms[-1]:7.1f}ms"
+    )
+
+
+async def main():
+    event_finding.events_version = fake_events_version
+    event_finding.get_all_events = fake_all_events
+
+    assistant.rag_answer = blocking_route_adapter
+    await run("blocking")
+
+    RAG_chatbot.get_embedding = fake_embedding
+    RAG_chatbot.retrieve_context = fake_retrieve_context
+    RAG_chatbot.answer_cache.lookup = no_cached_answer
+    RAG_chatbot.answer_cache.store = no_cached_answer
+    RAG_chatbot.call_gemini_rag = fake_gemini
+    assistant.rag_answer = RAG_chatbot.rag_answer
+    await run("async")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.utils.ai import LLMGateway, Target
+
+
+def _after(delay, value):
+    async def call():
+        await asyncio.sleep(delay)
+        return value
+    return call
+
+
+def test_fast_primary_is_not_hedged():
+    gateway = LLMGateway()
+    targets = [Target("p:m", _after(0, "primary"), hedge_after=0.5), Target("h:m", _after(0, "hedge"))]
+    assert asyncio.run(gateway.call(targets, hedge=True)) == "primary"
+    stats = gateway.stats()
+    assert stats["p:m"]["hedges"] == 0
+    assert len(gateway._state("p:m").latencies) == 1
+    assert "h:m" not in stats
+
+
+def test_hedge_wins_and_records_censored_primary_latency():
+    gateway = LLMGateway()
+    targets = [Target("p:m", _after(5, "primary"), hedge_after=0.05), Target("h:m", _after(0, "hedge"))]
+    assert asyncio.run(gateway.call(targets, hedge=True)) == "hedge"
+    primary = gateway._state("p:m")
+    assert primary.hedges == 1 and primary.hedge_wins == 1
+    # One sample of twice the time the primary ran before it was hedged away
+    assert len(primary.latencies) == 1
+    assert 0.1 <= primary.latencies[0] < 1
+    assert primary.breaker.state == "closed"
+
+
+def test_primary_win_after_hedge_records_nothing_for_the_hedge():
+    gateway = LLMGateway()
+    targets = [Target("p:m", _after(0.1, "primary"), hedge_after=0.02), Target("h:m", _after(5, "hedge"))]
+    assert asyncio.run(gateway.call(targets, hedge=True)) == "primary"
+    assert gateway._state("p:m").hedge_wins == 0
+    assert len(gateway._state("p:m").latencies) == 1
+    assert len(gateway._state("h:m").latencies) == 0
+
+
+def test_outer_cancellation_records_no_latency():
+    gateway = LLMGateway()
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(gateway.call([Target("p:m", _after(5, "primary"))]), 0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            hedged = [Target("q:m", _after(5, "primary"), hedge_after=0.01), Target("h:m", _after(5, "hedge"))]
+            await asyncio.wait_for(gateway.call(hedged, hedge=True), 0.05)
+
+    asyncio.run(main())
+    for name in ("p:m", "q:m", "h:m"):
+        state = gateway._state(name)
+        assert len(state.latencies) == 0
+        assert state.breaker.allow()
+
+
+def test_failed_primary_falls_back_in_order():
+    gateway = LLMGateway()
+
+    async def fail():
+        raise ValueError("bad request")
+
+    targets = [Target("p:m", fail, hedge_after=1), Target("h:m", _after(0, "hedge"))]
+    assert asyncio.run(gateway.call(targets, hedge=True)) == "hedge"
+    assert gateway._state("p:m").hedges == 0
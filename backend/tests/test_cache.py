@@ -0,0 +1,56 @@
+import asyncio
+
+from app.utils.cache import MemoryCacheBackend, ReadThroughCache
+
+
+def _cache():
+    return ReadThroughCache("artisan", backend=MemoryCacheBackend(maxsize=16, ttl=60))
+
+
+def test_miss_result_can_be_mutated_without_touching_the_cache():
+    cache = _cache()
+
+    async def load():
+        return {"user_id": "u1", "email": "a@example.com", "name": "Asha"}
+
+    async def main():
+        first = await cache.get_or_load("u1", load, aliases=lambda value: [value["email"]])
+        first.pop("email")
+        first["name"] = "changed"
+        return (
+            await cache.get_or_load("u1", load),
+            await cache.get_or_load("a@example.com", load),
+        )
+
+    by_id, by_alias = asyncio.run(main())
+    assert by_id == by_alias == {"user_id": "u1", "email": "a@example.com", "name": "Asha"}
+    assert cache.misses == 1 and cache.hits == 2
+
+
+def test_hit_result_can_be_mutated_without_touching_the_cache():
+    cache = _cache()
+
+    async def load():
+        return {"user_id": "u1", "name": "Asha"}
+
+    async def main():
+        await cache.get_or_load("u1", load)
+        hit = await cache.get_or_load("u1", load)
+        hit["name"] = "changed"
+        return await cache.get_or_load("u1", load)
+
+    assert asyncio.run(main())["name"] == "Asha"
+
+
+def test_missing_values_are_not_cached():
+    cache = _cache()
+    results = iter([None, {"user_id": "u1"}])
+
+    async def load():
+        return next(results)
+
+    async def main():
+        return await cache.get_or_load("u1", load), await cache.get_or_load("u1", load)
+
+    assert asyncio.run(main()) == (None, {"user_id": "u1"})
+    assert cache.misses == 2
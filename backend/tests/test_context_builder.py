@@ -0,0 +1,68 @@
+from bson import ObjectId
+
+from app.services.context_builder import CHARS_PER_TOKEN, build_context, estimate_tokens
+
+
+def _candidate(text, score=1.0, embedding=None):
+    candidate = {"_id": ObjectId(), "score": score, "text": text}
+    if embedding is not None:
+        candidate["embedding"] = embedding
+    return candidate
+
+
+def _words(count, word="clay"):
+    return " ".join([word] * count)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * CHARS_PER_TOKEN) == 1
+    assert estimate_tokens("a" * (CHARS_PER_TOKEN + 1)) == 2
+
+
+def test_chunks_stay_within_the_token_budget():
+    candidates = [_candidate(_words(40, word)) for word in ("loom", "dye", "kiln", "reed")]  # ~50 tokens each
+    context = build_context([1.0, 0.0], candidates, top_k=4, budget=120)
+    assert len(context["chunks"]) == 2
+    assert context["context_tokens"] <= 120
+    assert context["context_tokens"] == sum(estimate_tokens(chunk["text"]) for chunk in context["chunks"])
+
+
+def test_shorter_candidate_further_down_still_fits():
+    candidates = [_candidate(_words(40, "loom")), _candidate(_words(40, "dye")), _candidate("GI tag")]
+    context = build_context([1.0], candidates, top_k=3, budget=60)
+    assert [chunk["text"] for chunk in context["chunks"]] == [_words(40, "loom"), "GI tag"]
+
+
+def test_single_oversized_chunk_is_truncated_to_the_budget():
+    text = _words(400, "pashmina")
+    context = build_context([1.0], [_candidate(text)], top_k=3, budget=50)
+    (chunk,) = context["chunks"]
+    assert context["context_tokens"] <= 50
+    assert estimate_tokens(chunk["text"]) == context["context_tokens"]
+    assert text.startswith(chunk["text"]) and not chunk["text"].endswith(" ")
+    assert chunk["text"].split(" ")[-1] == "pashmina"  # cut on a word boundary
+
+
+def test_exact_and_near_duplicates_are_dropped():
+    candidates = [
+        _candidate("Pashmina shawls from Kashmir", 0.9, [1.0, 0.0, 0.0]),
+        _candidate("Pashmina  shawls from   Kashmir", 0.85, [1.0, 0.0, 0.0]),  # same text, other spacing
+        _candidate("Pashmina shawls, Kashmir", 0.8, [0.99, 0.01, 0.0]),  # near-duplicate vector
+        _candidate("Block printing in Bagru", 0.5, [0.0, 1.0, 0.0]),
+    ]
+    context = build_context([1.0, 0.0, 0.0], candidates, top_k=3, budget=500)
+    texts = [chunk["text"] for chunk in context["chunks"]]
+    assert texts == ["Pashmina shawls from Kashmir", "Block printing in Bagru"]
+    assert context["dropped_duplicates"] == 2
+    assert all(set(chunk) == {"_id", "score", "text"} for chunk in context["chunks"])
+
+
+def test_without_embeddings_retrieval_order_is_kept():
+    candidates = [_candidate(f"chunk {i} " + _words(3, "jute")) for i in range(5)]
+    context = build_context([1.0], candidates, top_k=3, budget=500)
+    assert [chunk["text"] for chunk in context["chunks"]] == [candidate["text"] for candidate in candidates[:3]]
+
+
+def test_empty_candidates():
+    assert build_context([1.0], [], top_k=3, budget=100) == {"chunks": [], "context_tokens": 0, "dropped_duplicates": 0}
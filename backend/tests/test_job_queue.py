@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.job_queue import JobQueue
+
+
+class FakeFiles:
+    """GridFS bucket double; `fail_uploads` makes every upload raise."""
+
+    def __init__(self, fail_uploads=False):
+        self.fail_uploads = fail_uploads
+        self.stored = {}
+
+    async def upload_from_stream(self, filename, data):
+        if self.fail_uploads:
+            raise ConnectionError("GridFS is unavailable")
+        file_id = ObjectId()
+        self.stored[file_id] = data
+        return file_id
+
+    async def delete(self, file_id):
+        self.stored.pop(file_id, None)
+
+
+def _queue(files):
+    queue = JobQueue(workers=1)
+    queue.collection = AsyncMongoMockClient()["test"]["jobs"]
+    queue._files = files
+    return queue
+
+
+async def _run_claimed(queue, kind):
+    job = {
+        "_id": "job-1",
+        "kind": kind,
+        "payload": {},
+        "input_files": {},
+        "status": "running",
+        "attempts": 1,
+        "worker_id": queue.worker_id,
+        "created_at": datetime.utcnow(),
+    }
+    await queue.collection.insert_one(job)
+    await queue._run(job)
+    return await queue.collection.find_one({"_id": "job-1"})
+
+
+def test_file_result_is_stored():
+    files = FakeFiles()
+    queue = _queue(files)
+
+    async def handler(payload):
+        return b"poster"
+
+    queue.register("poster", handler, content_type="image/png")
+    job = asyncio.run(_run_claimed(queue, "poster"))
+    assert job["status"] == "succeeded"
+    assert files.stored[job["result_file"]] == b"poster"
+    assert queue.succeeded == 1
+
+
+def test_failed_result_upload_fails_the_job():
+    queue = _queue(FakeFiles(fail_uploads=True))
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+        return b"poster"
+
+    queue.register("poster", handler, content_type="image/png")
+    job = asyncio.run(_run_claimed(queue, "poster"))
+    assert job["status"] == "failed"
+    assert job["error_status"] == 500
+    assert "GridFS is unavailable" in job["error"]
+    assert job.get("result_file") is None
+    assert len(calls) == 1
+    assert queue.failed == 1
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.utils.pagination import MAX_LIMIT, build_projection, decode_cursor, encode_cursor, paginate, parse_fields
+
+
+def test_id_cursor_round_trip():
+    doc_id = ObjectId()
+    assert decode_cursor(encode_cursor({"_id": doc_id})) == {"_id": {"$lt": doc_id}}
+
+
+def test_datetime_cursor_round_trip():
+    doc = {"_id": ObjectId(), "created_at": datetime(2025, 3, 1, 12, 30, 15, 123000)}
+    keyset = decode_cursor(encode_cursor(doc, "created_at"), "created_at")
+    assert keyset == {"$or": [
+        {"created_at": {"$lt": doc["created_at"]}},
+        {"created_at": doc["created_at"], "_id": {"$lt": doc["_id"]}},
+        {"created_at": None},
+    ]}
+
+
+@pytest.mark.parametrize("score", [0.1 + 0.2, 1.0, 2.718281828459045, 1e-7, 12345.6789])
+def test_float_score_cursor_round_trip_is_exact(score):
+    doc = {"_id": ObjectId(), "score": score}
+    keyset = decode_cursor(encode_cursor(doc, "score"), "score")
+    value = keyset["$or"][0]["score"]["$lt"]
+    assert isinstance(value, float)
+    assert value == score  # bit-for-bit, or ties at the page edge would be skipped or repeated
+    assert keyset["$or"][1] == {"score": score, "_id": {"$lt": doc["_id"]}}
+
+
+def test_cursor_without_sort_value_continues_with_undated_documents():
+    doc = {"_id": ObjectId(), "created_at": None}
+    keyset = decode_cursor(encode_cursor(doc, "created_at"), "created_at")
+    assert keyset == {"created_at": None, "_id": {"$lt": doc["_id"]}}
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor({"_id": ObjectId(), "score": 3.5}, "score")
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "not-base64!", "e30", encode_cursor({"_id": ObjectId()})[:-3]])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_for_another_sort_order_is_rejected():
+    cursor = encode_cursor({"_id": ObjectId(), "score": 1.5}, "score")
+    with pytest.raises(ValueError, match="sort order"):
+        decode_cursor(cursor, "created_at")
+
+
+def test_parse_fields_and_projection():
+    assert parse_fields(None) is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("name, price,") == ["name", "price"]
+    assert build_projection(["name", "password_hash"], "created_at", exclude=["password_hash"]) == {
+        "name": 1, "_id": 1, "created_at": 1,
+    }
+    assert build_projection(None, exclude=["password_hash"]) == {"password_hash": 0}
+    assert build_projection(None) is None
+
+
+def _collect(collection, **kwargs):
+    async def main():
+        pages, cursor = [], None
+        while True:
+            page = await paginate(collection, {}, cursor=cursor, **kwargs)
+            pages.append(page)
+            cursor = page["next_cursor"]
+            if not cursor:
+                return pages
+    return asyncio.run(main())
+
+
+def test_paginate_visits_every_document_once_with_tied_timestamps():
+    collection = AsyncMongoMockClient()["test"]["products"]
+    start = datetime(2025, 1, 1)
+    docs = [{"_id": ObjectId(), "n": i, "created_at": start + timedelta(minutes=i // 4)} for i in range(50)]
+    docs.append({"_id": ObjectId(), "n": 50})  # no created_at: comes last
+    asyncio.run(collection.insert_many(docs))
+
+    pages = _collect(collection, limit=7, sort_field="created_at")
+    seen = [doc["n"] for page in pages for doc in page["results"]]
+    assert sorted(seen) == list(range(51))
+    assert seen[-1] == 50
+    assert all(page["count"] == len(page["results"]) <= 7 for page in pages)
+
+
+def test_paginate_clamps_limit_and_rejects_unknown_sort():
+    collection = AsyncMongoMockClient()["test"]["artisans"]
+    asyncio.run(collection.insert_many([{"_id": ObjectId(), "n": i} for i in range(MAX_LIMIT + 5)]))
+    page = asyncio.run(paginate(collection, {}, limit=10_000))
+    assert page["count"] == MAX_LIMIT and page["next_cursor"]
+    with pytest.raises(ValueError):
+        asyncio.run(paginate(collection, {}, sort_field="score"))
@@ -0,0 +1,89 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.routers.assistant import RetrievedDocument
+from app.services.retrievers import AtlasVectorRetriever, text_search
+
+
+class FakeAggregate:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+
+def _project(expression, doc, key, meta_score):
+    """Evaluate one $project field the way Mongo does for the shapes the retrievers use."""
+    if expression == 1:
+        return doc.get(key)
+    if set(expression) == {"$meta"}:
+        return meta_score
+    # Any other object is an embedded document of expressions
+    return {name: _project(value, doc, name, meta_score) for name, value in expression.items()}
+
+
+class FakeCollection:
+    """Applies the $project stage of a pipeline, with every $meta score set to `meta_score`."""
+
+    def __init__(self, docs, meta_score=0.87):
+        self.docs = docs
+        self.meta_score = meta_score
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        project = next(stage["$project"] for stage in pipeline if "$project" in stage)
+        projected = []
+        for doc in self.docs:
+            out = {}
+            for key, expression in project.items():
+                value = _project(expression, doc, key, self.meta_score)
+                if value is not None:
+                    out[key] = value
+            projected.append(out)
+        return FakeAggregate(projected)
+
+
+def _docs():
+    return [
+        {"_id": ObjectId(), "text": "PM Vishwakarma scheme", "embedding": [0.1, 0.2]},
+        {"_id": ObjectId(), "chunk": "GI tag registration", "embedding": [0.3, 0.4]},
+    ]
+
+
+def _assert_hits(hits, with_vectors=False):
+    assert hits
+    for hit in hits:
+        expected = {"_id", "score", "text"} | ({"embedding"} if with_vectors else set())
+        assert set(hit) == expected
+        assert isinstance(hit["score"], float)
+        assert isinstance(hit["text"], str) and hit["text"]
+        RetrievedDocument.model_validate(hit)
+
+
+def test_vector_search_hits_have_float_scores():
+    collection = FakeCollection(_docs())
+    hits = asyncio.run(AtlasVectorRetriever(collection).search([0.0] * 384, top_k=2))
+    _assert_hits(hits)
+    assert hits[1]["text"] == "GI tag registration"
+
+
+def test_vector_search_with_vectors_keeps_embeddings():
+    collection = FakeCollection(_docs())
+    hits = asyncio.run(AtlasVectorRetriever(collection).search([0.0] * 384, top_k=2, with_vectors=True))
+    _assert_hits(hits, with_vectors=True)
+
+
+def test_text_search_hits_have_float_scores():
+    collection = FakeCollection(_docs(), meta_score=2.5)
+    hits = asyncio.run(text_search(collection, "vishwakarma", limit=2))
+    _assert_hits(hits)
+    assert hits[0]["score"] == 2.5
+
+
+def test_text_search_skips_blank_queries():
+    collection = FakeCollection(_docs())
+    assert asyncio.run(text_search(collection, "   ", limit=2)) == []
+    assert collection.pipelines == []
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+from bson.regex import Regex
+
+from app.utils.search import artisan_search_fields, normalize_text, prefix_query, search_tokens
+
+
+def _patterns(query, field):
+    if "$and" in query:
+        return [condition[field].pattern for condition in query["$and"]]
+    return [query[field].pattern]
+
+
+def test_single_word_is_an_anchored_prefix():
+    query = prefix_query("skills_norm", "Pottery")
+    assert isinstance(query["skills_norm"], Regex)
+    assert query["skills_norm"].pattern == "^pottery"
+
+
+def test_multi_word_terms_need_every_prefix():
+    query = prefix_query("location_norm", "New  Del")
+    assert _patterns(query, "location_norm") == ["^new", "^del"]
+
+
+@pytest.mark.parametrize("term", ["a.b", "c++", "x*", "(wood)", "[clay]", "1$", "^gold", "a|b", "what?", "a\\b", "{2}"])
+def test_regex_metacharacters_never_reach_the_pattern_unescaped(term):
+    query = prefix_query("skills_norm", term)
+    for pattern in _patterns(query, "skills_norm"):
+        assert pattern.startswith("^")
+        body = pattern[1:]
+        assert body and re.escape(body) == body  # nothing left that a regex would interpret
+
+
+def test_punctuation_splits_terms_into_literal_prefixes():
+    query = prefix_query("skills_norm", "3.5mm (clay)")
+    patterns = [re.compile(pattern) for pattern in _patterns(query, "skills_norm")]
+    assert [pattern.pattern for pattern in patterns] == ["^3", "^5mm", "^clay"]
+    # "." is a separator, not a wildcard: "345" only matches the first prefix
+    assert not all(pattern.match("345") for pattern in patterns)
+
+
+def test_non_ascii_words_are_escaped_verbatim():
+    query = prefix_query("skills_norm", "मधुबनी")
+    assert query["skills_norm"].pattern == "^" + re.escape("मधुबनी")
+    assert re.compile(query["skills_norm"].pattern).match("मधुबनी चित्रकला")
+
+
+def test_term_without_letters_or_digits_is_rejected():
+    with pytest.raises(ValueError):
+        prefix_query("skills_norm", " -- ")
+
+
+def test_normalize_text_folds_case_accents_and_punctuation():
+    assert normalize_text("  Madhubani—Painting, ÉCOLE  ") == "madhubani painting ecole"
+    # Devanagari vowel signs are combining marks that must survive
+    assert normalize_text("मधुबनी") == "मधुबनी"
+    assert normalize_text(None) == ""
+
+
+def test_search_tokens_keep_phrases_and_words_once():
+    assert search_tokens(["Block Printing", "printing", None]) == ["block printing", "block", "printing"]
+    assert artisan_search_fields(["Pottery"], "Jaipur, Rajasthan") == {
+        "skills_norm": ["pottery"],
+        "location_norm": ["jaipur rajasthan", "jaipur", "rajasthan"],
+    }
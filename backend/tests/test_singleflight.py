@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight, make_key
+
+
+def test_make_key_is_stable_and_order_sensitive():
+    assert make_key("model", ["clay", "pot"], None) == make_key("model", ["clay", "pot"], None)
+    assert make_key("model", ["clay", "pot"]) != make_key("model", ["pot", "clay"])
+    assert make_key("a", "b") != make_key("ab")
+
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight("test-coalesce")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": 42}
+
+    async def main():
+        key = make_key("same", "args")
+        return await asyncio.gather(*(flight.do(key, work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result == {"answer": 42} for result in results)
+    # Followers get their own copy
+    assert len({id(result) for result in results}) == 5
+    assert flight.stats()["deduplicated"] == 4 and flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight("test-distinct")
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def main():
+        return await asyncio.gather(
+            flight.do(make_key("a"), lambda: work("a")),
+            flight.do(make_key("b"), lambda: work("b")),
+        )
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_nothing_is_cached_after_the_call_finishes():
+    flight = SingleFlight("test-no-cache")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        key = make_key("k")
+        return await flight.do(key, work), await flight.do(key, work)
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test-errors")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def main():
+        key = make_key("k")
+        return await asyncio.gather(*(flight.do(key, work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test-cancel")
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "done"
+
+    async def main():
+        key = make_key("k")
+        leader = asyncio.ensure_future(flight.do(key, work))
+        follower = asyncio.ensure_future(flight.do(key, work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+    assert finished == [1]
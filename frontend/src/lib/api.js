@@ -104,18 +104,46 @@ async function getArtisans(params = {}) {
   return client().get('/api/v1/artisans/', { params }).then(r => r.data)
 }
 
-async function getArtisansBySkill(skill) {
-  return client().get(`/api/v1/artisans/skill/${encodeURIComponent(skill)}`).then(r => r.data)
+// Follow next_cursor to the last page of a paginated list endpoint.
+// onPage(resultsSoFar) is called after every page so callers can render progressively.
+async function collectPages(fetchPage, params = {}, onPage = null) {
+  const all = []
+  let cursor = null
+  do {
+    const page = await fetchPage(cursor ? { ...params, cursor } : params)
+    all.push(...(page && Array.isArray(page.results) ? page.results : []))
+    if (onPage) onPage(all.slice())
+    cursor = page ? page.next_cursor : null
+  } while (cursor)
+  return all
 }
 
-async function getArtisansByLocation(location) {
-  return client().get(`/api/v1/artisans/location/${encodeURIComponent(location)}`).then(r => r.data)
+async function getAllArtisans(onPage = null) {
+  return collectPages(getArtisans, { limit: 200 }, onPage)
+}
+
+async function getArtisansBySkill(skill, params = {}) {
+  return client().get(`/api/v1/artisans/skill/${encodeURIComponent(skill)}`, { params }).then(r => r.data)
+}
+
+async function getArtisansByLocation(location, params = {}) {
+  return client().get(`/api/v1/artisans/location/${encodeURIComponent(location)}`, { params }).then(r => r.data)
 }
 
 async function getArtisan(userId) {
   return client().get(`/api/v1/artisans/${encodeURIComponent(userId)}`).then(r => r.data)
 }
 
+// Resolve many artisan cards in one request; long id lists go in a POST body
+async function getArtisansBatch(userIds = [], fields = null) {
+  if (userIds.length > 50) {
+    return client().post('/api/v1/artisans/batch', { ids: userIds, fields }).then(r => r.data)
+  }
+  const params = { ids: userIds.join(',') }
+  if (fields) params.fields = fields.join(',')
+  return client().get('/api/v1/artisans/batch', { params }).then(r => r.data)
+}
+
 async function getCurrentUserArtisan() {
   const user = await getCurrentUser()
   if (!user || !user.email) {
@@ -151,8 +179,13 @@ async function updateArtisanProfile(artisanId, profileData = {}, profilePhoto =
   return client().patch(`/api/v1/artisans/${encodeURIComponent(artisanId)}/profile`, profileData).then(r => r.data)
 }
 
-async function getArtisanProducts(artisanId) {
-  return client().get(`/api/v1/artisans/${encodeURIComponent(artisanId)}/products`).then(r => r.data)
+async function getArtisanProducts(artisanId, params = {}) {
+  return client().get(`/api/v1/artisans/${encodeURIComponent(artisanId)}/products`, { params }).then(r => r.data)
+}
+
+// Every product of an artisan, following next_cursor
+async function getAllArtisanProducts(artisanId) {
+  return collectPages(params => getArtisanProducts(artisanId, params), { limit: 200 })
 }
 
 async function addArtisanProduct(artisanId, product = {}) {
@@ -168,8 +201,13 @@ async function addArtisanProduct(artisanId, product = {}) {
   return client().post(`/api/v1/artisans/${encodeURIComponent(artisanId)}/products`, product).then(r => r.data)
 }
 
-async function getArtisanProductsByEmail(email) {
-  return client().get(`/api/v1/artisans/by-email/${encodeURIComponent(email)}/products`).then(r => r.data)
+async function getArtisanProductsByEmail(email, params = {}) {
+  return client().get(`/api/v1/artisans/by-email/${encodeURIComponent(email)}/products`, { params }).then(r => r.data)
+}
+
+// Every product of the artisan with this email, following next_cursor
+async function getAllArtisanProductsByEmail(email) {
+  return collectPages(params => getArtisanProductsByEmail(email, params), { limit: 200 })
 }
 
 async function addArtisanProductByEmail(email, product = {}) {
@@ -185,10 +223,33 @@ async function addArtisanProductByEmail(email, product = {}) {
   return client().post(`/api/v1/artisans/by-email/${encodeURIComponent(email)}/products`, product).then(r => r.data)
 }
 
+// Bulk upload: pass an array of product objects, or a CSV File/Blob with a header row
+function bulkProductsRequest(path, products) {
+  if (typeof Blob !== 'undefined' && products instanceof Blob) {
+    const fd = new FormData()
+    fd.append('file', products)
+    return clientFormData().post(path, fd).then(r => r.data)
+  }
+  return client().post(path, products).then(r => r.data)
+}
+
+async function addArtisanProductsBulk(artisanId, products) {
+  return bulkProductsRequest(`/api/v1/artisans/${encodeURIComponent(artisanId)}/products/bulk`, products)
+}
+
+async function addArtisanProductsBulkByEmail(email, products) {
+  return bulkProductsRequest(`/api/v1/artisans/by-email/${encodeURIComponent(email)}/products/bulk`, products)
+}
+
 async function deleteArtisanProduct(artisanId, productId) {
   return client().delete(`/api/v1/artisans/${encodeURIComponent(artisanId)}/products/${encodeURIComponent(productId)}`).then(r => r.data)
 }
 
+// ---- Products ----
+async function searchProducts(q, params = {}) {
+  return client().get('/api/v1/products/search', { params: { q, ...params } }).then(r => r.data)
+}
+
 async function getMarketingOutput(artisanId, prompt, image = null) {
   if (!prompt) {
     throw new Error('Prompt is required for marketing content generation')
@@ -255,7 +316,12 @@ async function findEvents(params = {}) {
 }
 
 async function getAllEvents(params = {}) {
-  return client().get('/api/v1/events/').then(r => r.data)
+  return client().get('/api/v1/events/', { params }).then(r => r.data)
+}
+
+// Every event, following next_cursor; onPage(eventsSoFar) is called after each page
+async function getEveryEvent(onPage = null) {
+  return collectPages(getAllEvents, { limit: 200 }, onPage)
 }
 
 // ---- Assistant ----
@@ -263,6 +329,47 @@ async function assistantChat(chatReq) {
   return client().post('/api/v1/assistant/chat', chatReq).then(r => r.data)
 }
 
+// Streams /assistant/chat/stream (server-sent events). axios cannot read a response body
+// incrementally in the browser, so this uses fetch. handlers: { onRetrieved, onToken, onDone }.
+// Pass an AbortSignal to stop early; the server then cancels the Gemini call.
+async function assistantChatStream(chatReq, handlers = {}, signal) {
+  const headers = { 'Content-Type': 'application/json', Accept: 'text/event-stream' }
+  if (accessToken) headers.Authorization = `Bearer ${accessToken}`
+  const res = await fetch(`${BASE_URL}/api/v1/assistant/chat/stream`, {
+    method: 'POST',
+    credentials: 'include',
+    headers,
+    body: JSON.stringify(chatReq),
+    signal,
+  })
+  if (!res.ok || !res.body) throw new Error(`Chat stream failed: ${res.status}`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      const payload = data ? JSON.parse(data) : null
+      if (event === 'retrieved') handlers.onRetrieved?.(payload)
+      else if (event === 'token') handlers.onToken?.(payload.text)
+      else if (event === 'done') handlers.onDone?.(payload)
+      else if (event === 'error') throw new Error(payload?.detail || 'Chat stream failed')
+    }
+  }
+}
+
 // ---- Profile ----
 async function generateStoryFromBio(artisanId, extraInfo = "") {
   const params = {}
@@ -289,28 +396,39 @@ const api = {
   getCurrentUser,
 
   getArtisans,
+  getAllArtisans,
+  collectPages,
   getArtisansBySkill,
   getArtisansByLocation,
   getArtisan,
+  getArtisansBatch,
   getArtisanByEmail,
   getCurrentUserArtisan,
   createArtisanProfile,
   createArtisanProfileByEmail,
   updateArtisanProfile,
   getArtisanProducts,
+  getAllArtisanProducts,
   getArtisanProductsByEmail,
+  getAllArtisanProductsByEmail,
   addArtisanProduct,
   addArtisanProductByEmail,
+  addArtisanProductsBulk,
+  addArtisanProductsBulkByEmail,
   deleteArtisanProduct,
   getMarketingOutput,
 
+  searchProducts,
+
   generateProductDescription,
   generatePoster,
 
   getAllEvents,
+  getEveryEvent,
   findEvents,
 
   assistantChat,
+  assistantChatStream,
 
   generateStoryFromBio,
 }
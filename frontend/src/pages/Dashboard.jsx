@@ -143,7 +143,7 @@ const Dashboard = () => {
       setLoadingProducts(true)
       console.log("[DEBUG] Fetching products for userEmail:", userEmail);
       try {
-        const data = await api.getArtisanProductsByEmail(userEmail);
+        const data = await api.getAllArtisanProductsByEmail(userEmail);
         console.log("[DEBUG] Products fetched:", data);
         setProducts(data);
       } catch (err) {
@@ -160,9 +160,8 @@ const Dashboard = () => {
     const fetchEvents = async () => {
       setLoadingEvents(true)
       try {
-        const data = await api.findEvents({})
-        // The backend returns { results: [...], count: N }
-        setEvents(Array.isArray(data.results) ? data.results : [])
+        // The backend pages through all events; follow next_cursor to the end
+        setEvents(await api.getEveryEvent())
       } catch {
         setEvents([])
       }
@@ -194,8 +193,7 @@ const Dashboard = () => {
       console.log("Product added successfully:", product)
       
       // Refresh the products list
-      const data = await api.getArtisanProductsByEmail(userEmail)
-      setProducts(data)
+      setProducts(await api.getAllArtisanProductsByEmail(userEmail))
       
       setNewProduct({ 
         name: "", 
@@ -318,8 +316,8 @@ const Dashboard = () => {
         params.date = eventFilter.date
       }
       
-      const data = await api.findEvents(params)
-      filteredEvents = Array.isArray(data.results) ? data.results : []
+      // Without a location the backend pages through all events, so follow next_cursor
+      filteredEvents = await api.collectPages(api.findEvents, { limit: 200, ...params })
       
       console.log("Filtered events:", filteredEvents)
       setEvents(filteredEvents)
@@ -370,14 +368,28 @@ const Dashboard = () => {
         query: chatInput,
         top_k: 5
       }
-      const res = await api.assistantChat(chatRequest)
-      setChatHistory((prev) => [
-        ...prev,
-        { role: "assistant", content: res.answer || "No answer." },
-      ])
+      // Show the answer as it is generated instead of waiting for the whole completion
+      setChatHistory((prev) => [...prev, { role: "assistant", content: "" }])
+      let answer = ""
+      await api.assistantChatStream(chatRequest, {
+        onToken: (text) => {
+          answer += text
+          setChatHistory((prev) => [
+            ...prev.slice(0, -1),
+            { role: "assistant", content: answer },
+          ])
+        },
+      })
+      if (!answer) {
+        setChatHistory((prev) => [
+          ...prev.slice(0, -1),
+          { role: "assistant", content: "No answer." },
+        ])
+      }
     } catch {
+      // Replace the streaming placeholder rather than adding a second assistant message
       setChatHistory((prev) => [
-        ...prev,
+        ...(prev[prev.length - 1]?.role === "assistant" ? prev.slice(0, -1) : prev),
         { role: "assistant", content: "Sorry, I couldn't fetch an answer." },
       ])
     }
@@ -843,8 +855,7 @@ const Dashboard = () => {
                       const fetchAll = async () => {
                         setLoadingEvents(true)
                         try {
-                          const data = await api.findEvents({})
-                          setEvents(Array.isArray(data.results) ? data.results : [])
+                          setEvents(await api.getEveryEvent())
                         } catch {
                           setEvents([])
                         }
@@ -1,6 +1,28 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import api from "../lib/api";
 
+function filterArtisans(artisans, location, skill) {
+  let filteredResults = artisans;
+
+  if (location.trim()) {
+    filteredResults = filteredResults.filter(artisan =>
+      artisan.location &&
+      artisan.location.toLowerCase().includes(location.toLowerCase())
+    );
+  }
+
+  if (skill.trim()) {
+    filteredResults = filteredResults.filter(artisan =>
+      artisan.skills &&
+      artisan.skills.some(s =>
+        s.toLowerCase().includes(skill.toLowerCase())
+      )
+    );
+  }
+
+  return filteredResults;
+}
+
 export default function HiddenGemsIndia() {
   // Main app state
   const [selectedArtisan, setSelectedArtisan] = useState(null);
@@ -15,6 +37,8 @@ export default function HiddenGemsIndia() {
   const [displayedArtisans, setDisplayedArtisans] = useState([]);
   const [currentPage, setCurrentPage] = useState(1);
   const ARTISANS_PER_PAGE = 12;
+  // The applied location/skill filter; re-applied as further pages of artisans arrive
+  const activeFilter = useRef(null);
 
   // Events section state
   const [eventLocation, setEventLocation] = useState("");
@@ -24,16 +48,16 @@ export default function HiddenGemsIndia() {
   const [allEvents, setAllEvents] = useState([]);
   const [eventsLoading, setEventsLoading] = useState(false);
 
-  // Load all artisans on component mount
+  // Load all artisans on component mount. The list endpoint is paginated, so follow
+  // next_cursor to the end; the first page renders as soon as it arrives.
   useEffect(() => {
     const loadAllArtisans = async () => {
       try {
-        const data = await api.getArtisans();
-        const artisansArray = Array.isArray(data) ? data : [];
-        setAllArtisans(artisansArray);
-        setResults(artisansArray);
-        setDisplayedArtisans(artisansArray.slice(0, ARTISANS_PER_PAGE));
-        setCurrentPage(1);
+        await api.getAllArtisans(artisansSoFar => {
+          setAllArtisans(artisansSoFar);
+          const filter = activeFilter.current;
+          setResults(filter ? filterArtisans(artisansSoFar, filter.location, filter.skill) : artisansSoFar);
+        });
       } catch (err) {
         console.error("Error loading artisans:", err);
         setAllArtisans([]);
@@ -49,8 +73,7 @@ export default function HiddenGemsIndia() {
     const fetchAllEvents = async () => {
       setEventsLoading(true);
       try {
-        const data = await api.getAllEvents();
-        const eventsArray = data && Array.isArray(data.results) ? data.results : [];
+        const eventsArray = await api.getEveryEvent();
         setAllEvents(eventsArray);
         setEvents(eventsArray.slice(0, 5));
       } catch (err) {
@@ -72,8 +95,8 @@ export default function HiddenGemsIndia() {
   // When an artisan is selected, fetch their products
   useEffect(() => {
     if (selectedArtisan) {
-      api.getArtisanProducts(selectedArtisan.id)
-        .then(data => setArtisanProducts(Array.isArray(data) ? data : []))
+      api.getAllArtisanProducts(selectedArtisan.id)
+        .then(setArtisanProducts)
         .catch(err => {
           console.error("Error fetching artisan products:", err);
           setArtisanProducts([]);
@@ -87,25 +110,8 @@ export default function HiddenGemsIndia() {
     setLoading(true);
 
     try {
-      let filteredResults = allArtisans;
-
-      if (location.trim()) {
-        filteredResults = filteredResults.filter(artisan =>
-          artisan.location &&
-          artisan.location.toLowerCase().includes(location.toLowerCase())
-        );
-      }
-
-      if (skill.trim()) {
-        filteredResults = filteredResults.filter(artisan =>
-          artisan.skills &&
-          artisan.skills.some(s =>
-            s.toLowerCase().includes(skill.toLowerCase())
-          )
-        );
-      }
-
-      setResults(filteredResults);
+      activeFilter.current = location.trim() || skill.trim() ? { location, skill } : null;
+      setResults(filterArtisans(allArtisans, location, skill));
     } catch (err) {
       console.error("Error searching artisans:", err);
       setResults([]);
@@ -117,6 +123,7 @@ export default function HiddenGemsIndia() {
   const clearFilters = () => {
     setLocation("");
     setSkill("");
+    activeFilter.current = null;
     setResults(allArtisans);
   };
 